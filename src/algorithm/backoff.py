@@ -1,29 +1,197 @@
+import asyncio
+import functools
+import inspect
 import random
+import threading
 import time
 import typing as t
+from abc import ABC, abstractmethod
 
 
-class ExponentialBackoff:
-    def __init__(self, base: int = 1, *, integral: bool = False) -> None:
+class Backoff(ABC):
+    """
+    Base class for the backoff policies.
+
+    Every policy is guarded by a lock, so a single instance can be shared by many
+    threads and asyncio tasks which retry against the same upstream.
+    """
+
+    def __init__(
+        self,
+        base: float = 1,
+        *,
+        integral: bool = False,
+        max_exponent: int = 10,
+        cap: t.Optional[float] = None,
+        reset_time: t.Optional[float] = None,
+    ) -> None:
         self._base = base
+        self._max = max_exponent
+        self._cap = cap
+        self._reset_time = base * 2 ** (max_exponent + 1) if reset_time is None else reset_time
 
         self._exp = 0
-        self._max = 10
-        self._reset_time = base * 2 ** 11
         self._last_invocation = time.monotonic()
+        self._lock = threading.Lock()
 
         rand = random.Random()
         rand.seed()
 
+        self._integral = integral
         self._randfunc = rand.randrange if integral else rand.uniform
 
+    def _ceiling(self) -> float:
+        ceiling = self._base * 2 ** self._exp
+        if self._cap is not None:
+            ceiling = min(ceiling, self._cap)
+        return ceiling
+
+    @abstractmethod
+    def _next_delay(self) -> t.Any:
+        """The delay to hand out for the current exponent, called under the lock."""
+
     def delay(self) -> t.Any:
-        invocation = time.monotonic()
-        interval = invocation - self._last_invocation
-        self._last_invocation = invocation
+        with self._lock:
+            invocation = time.monotonic()
+            interval = invocation - self._last_invocation
+            self._last_invocation = invocation
+
+            if interval > self._reset_time:
+                self.reset()
+
+            self._exp = min(self._exp + 1, self._max)
+            return self._next_delay()
+
+    def reset(self) -> None:
+        self._exp = 0
+
+
+class ExponentialBackoff(Backoff):
+    """Full jitter: a random delay between 0 and the exponential ceiling."""
+
+    def _next_delay(self) -> t.Any:
+        return self._randfunc(0, self._ceiling())
+
+
+class EqualJitterBackoff(Backoff):
+    """Half of the exponential ceiling, plus a random delay up to the other half."""
+
+    def _next_delay(self) -> t.Any:
+        half = self._ceiling() / 2
+        if self._integral:
+            half = int(half)
+            return half + self._randfunc(0, half + 1)
+        return half + self._randfunc(0, half)
+
+
+class DecorrelatedJitterBackoff(Backoff):
+    """Random delay between `base` and three times the previous delay, bounded by `cap`."""
+
+    def __init__(self, base: float = 1, *, cap: float = 1024, **kwargs) -> None:
+        super().__init__(base, cap=cap, **kwargs)
+        self._previous = base
+
+    def _next_delay(self) -> t.Any:
+        upper = min(self._cap, self._previous * 3)
+        if self._integral:
+            upper = int(upper) + 1
+        self._previous = max(self._randfunc(self._base, upper), self._base)
+        return self._previous
+
+    def reset(self) -> None:
+        super().reset()
+        self._previous = self._base
+
+
+class RetryBudget:
+    """
+    Token bucket shared between every caller that retries against the same upstream.
+
+    Each retry spends a token and tokens refill at `rate` per second up to `capacity`,
+    so a burst of failures can only add a bounded amount of extra load.
+    """
+
+    def __init__(self, rate: float = 10.0, capacity: float = 100.0) -> None:
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_spend(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+
+            self._tokens -= tokens
+            return True
+
+
+def make_backoff(backoff: t.Union[Backoff, t.Callable[[], Backoff], None]) -> Backoff:
+    if backoff is None:
+        return ExponentialBackoff()
+    if isinstance(backoff, Backoff):
+        return backoff
+    return backoff()
+
+
+def retry(
+    exceptions: t.Union[t.Type[BaseException], t.Tuple[t.Type[BaseException], ...]] = Exception,
+    *,
+    attempts: int = 5,
+    backoff: t.Union[Backoff, t.Callable[[], Backoff], None] = None,
+    budget: t.Optional[RetryBudget] = None,
+) -> t.Callable:
+    """
+    Retry a sync or async callable when it raises one of `exceptions`.
+
+    `backoff` may be a shared policy instance or a factory which is called once per
+    invocation. When a `budget` is given and runs dry, the last error is raised
+    straight away instead of retrying.
+    """
+    if attempts < 1:
+        raise ValueError("attempts must be greater than 0.")
+
+    def decorator(func: t.Callable) -> t.Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs) -> t.Any:
+                policy = make_backoff(backoff)
+                for attempt in range(1, attempts + 1):
+                    try:
+                        return await func(*args, **kwargs)
+                    except exceptions:
+                        if attempt == attempts or (budget is not None and not budget.try_spend()):
+                            raise
+                    await asyncio.sleep(policy.delay())
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> t.Any:
+            policy = make_backoff(backoff)
+            for attempt in range(1, attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except exceptions:
+                    if attempt == attempts or (budget is not None and not budget.try_spend()):
+                        raise
+                time.sleep(policy.delay())
 
-        if interval > self._reset_time:
-            self._exp = 0
+        return wrapper
 
-        self._exp = min(self._exp + 1, self._max)
-        return self._randfunc(0, self._base * 2 ** self._exp)
+    return decorator
@@ -0,0 +1,112 @@
+import datetime
+import typing as t
+from bisect import bisect_left
+
+# (minimum, maximum) of each cron field, in expression order.
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+MAX_YEARS_AHEAD = 8
+
+
+def parse_field(field: str, minimum: int, maximum: int) -> t.List[int]:
+    values = set()
+
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+            if step <= 0:
+                raise ValueError(f"Invalid step in cron field {field!r}.")
+
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            end = maximum if step != 1 else start
+
+        # Both 0 and 7 mean sunday in the weekday field.
+        if maximum == 6 and end == 7:
+            values.add(0)
+            if start == 7:
+                continue
+            end = 6
+
+        if not minimum <= start <= end <= maximum:
+            raise ValueError(f"Cron field {field!r} is out of range {minimum}-{maximum}.")
+
+        values.update(range(start, end + 1, step))
+
+    return sorted(values)
+
+
+class CronSchedule:
+    """
+    Standard 5-field cron expression: `minute hour day-of-month month day-of-week`.
+
+    The next fire time is found field by field, jumping straight to the next
+    allowed month, day, hour and minute instead of stepping one minute at a time.
+    Fields are matched in the timezone of the datetime given to `next_after`, which
+    is UTC for `loop(cron=...)`.
+    """
+
+    def __init__(self, expression: str) -> None:
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 cron fields, got {len(fields)} in {expression!r}.")
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            parse_field(field, *limits) for field, limits in zip(fields, FIELD_RANGES)
+        )
+
+        # Like vixie cron, when both day fields are restricted either of them may match.
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def __repr__(self) -> str:
+        return f"<CronSchedule {self.expression!r}>"
+
+    def _day_matches(self, when: datetime.datetime) -> bool:
+        day_match = when.day in self.days
+        weekday_match = (when.weekday() + 1) % 7 in self.weekdays
+
+        if self._any_day or self._any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_after(self, when: datetime.datetime) -> datetime.datetime:
+        tzinfo = when.tzinfo
+        candidate = when.replace(second=0, microsecond=0, tzinfo=None)
+        candidate += datetime.timedelta(minutes=1)
+        last_year = candidate.year + MAX_YEARS_AHEAD
+
+        while candidate.year <= last_year:
+            if candidate.month not in self.months:
+                index = bisect_left(self.months, candidate.month)
+                year = candidate.year + (index == len(self.months))
+                month = self.months[index % len(self.months)]
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+                continue
+
+            if candidate.hour not in self.hours:
+                index = bisect_left(self.hours, candidate.hour)
+                if index == len(self.hours):
+                    candidate = candidate.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+                else:
+                    candidate = candidate.replace(hour=self.hours[index], minute=0)
+                continue
+
+            index = bisect_left(self.minutes, candidate.minute)
+            if index == len(self.minutes):
+                candidate = candidate.replace(minute=0) + datetime.timedelta(hours=1)
+                continue
+
+            return candidate.replace(minute=self.minutes[index], tzinfo=tzinfo)
+
+        raise ValueError(f"Cron expression {self.expression!r} never matches.")
@@ -1,6 +1,20 @@
 import asyncio
+import concurrent.futures
+import functools
+import itertools
+import os
 import threading
 import typing as t
+import weakref
+
+
+def _copy_result(future: concurrent.futures.Future, task: asyncio.Task) -> None:
+    if task.cancelled():
+        future.set_exception(concurrent.futures.CancelledError())
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
 
 
 # -- The portal for the sync object creation --
@@ -8,23 +22,124 @@ class Portal:
     def __init__(self, stop_event: t.Any) -> None:
         self.loop = asyncio.get_event_loop()
         self.stop_event = stop_event
+        self.thread = threading.current_thread()
+
+        self._main_task = asyncio.current_task()
+        self._stop_future = None
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _track(self, future: concurrent.futures.Future) -> concurrent.futures.Future:
+        with self._pending_lock:
+            self._pending += 1
+        future.add_done_callback(self._untrack)
+        return future
+
+    def _untrack(self, _: concurrent.futures.Future) -> None:
+        with self._pending_lock:
+            self._pending -= 1
 
     @staticmethod
     async def _call(fn: t.Callable, args: t.List, kwargs: t.Dict) -> t.Any:
         return await fn(*args, **kwargs)
 
-    async def _stop(self) -> None:
+    @property
+    def closed(self) -> bool:
+        return self._stop_future is not None
+
+    def __enter__(self) -> "Portal":
+        return self
+
+    def __exit__(self, type: t.Any, value: t.Any, traceback: t.Any) -> None:
+        self.stop(cancel_pending=type is not None).result()
+        self.join()
+
+    def _check_open(self) -> None:
+        if self.closed:
+            raise RuntimeError("Portal has been stopped, create a new one.")
+
+    async def _stop(self, cancel_pending: bool = False) -> None:
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task not in (current, self._main_task)]
+
+        if cancel_pending:
+            for task in tasks:
+                task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
         self.stop_event.set()
 
     def call(self, fn: t.Callable, *args, **kwargs) -> t.Any:
-        return asyncio.run_coroutine_threadsafe(self._call(fn, args, kwargs), self.loop)
+        self._check_open()
+        return self._track(
+            asyncio.run_coroutine_threadsafe(self._call(fn, args, kwargs), self.loop)
+        )
+
+    def _start_batch(self, batch: t.List[t.Tuple[t.Callable, tuple, concurrent.futures.Future]]) -> None:
+        for fn, args, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            task = self.loop.create_task(self._call(fn, args, {}))
+            task.add_done_callback(functools.partial(_copy_result, future))
+
+    def call_many(self, calls: t.Iterable[t.Sequence]) -> t.List[concurrent.futures.Future]:
+        """
+        Schedule a batch of `(fn, *args)` calls with a single wakeup of the portal loop.
+
+        Returns one `concurrent.futures.Future` per call, in the same order.
+        """
+        self._check_open()
+        batch = [
+            (fn, tuple(args), self._track(concurrent.futures.Future()))
+            for fn, *args in calls
+        ]
+        if batch:
+            self.loop.call_soon_threadsafe(self._start_batch, batch)
+
+        return [future for *_, future in batch]
 
-    def stop(self) -> None:
-        return self.call(self._stop)
+    def call_sync(self, fn: t.Callable, *args, timeout: t.Optional[float] = None, **kwargs) -> t.Any:
+        """Run `fn` on the portal loop and block for its result, cancelling it on timeout."""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("call_sync can't be used from the portal's own thread.")
+
+        future = self.call(fn, *args, **kwargs)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def map(self, fn: t.Callable, *iterables, timeout: t.Optional[float] = None) -> t.List[t.Any]:
+        """Like the builtin `map`, run as a single batch on the portal loop."""
+        futures = self.call_many((fn, *args) for args in zip(*iterables))
+        return [future.result(timeout) for future in futures]
+
+    def imap(self, fn: t.Callable, *iterables, timeout: t.Optional[float] = None) -> t.Iterator[t.Any]:
+        """Yield the results of a batch as they complete, rather than in order."""
+        futures = self.call_many((fn, *args) for args in zip(*iterables))
+        for future in concurrent.futures.as_completed(futures, timeout):
+            yield future.result()
+
+    def stop(self, cancel_pending: bool = False) -> concurrent.futures.Future:
+        """Stop the portal once in-flight calls are done, or cancel them with `cancel_pending`."""
+        if self._stop_future is None:
+            self._stop_future = asyncio.run_coroutine_threadsafe(
+                self._stop(cancel_pending), self.loop
+            )
+        return self._stop_future
+
+    def join(self, timeout: t.Optional[float] = None) -> None:
+        self.thread.join(timeout)
 
 
 # -- Helper function to generate portal objects --
-def create_portal() -> Portal:
+def create_portal(daemon: bool = False) -> Portal:
     """
     Usage Documentation:
 
@@ -41,6 +156,11 @@ def create_portal() -> Portal:
     print(portal.call(test, "WORLD").result())
 
     portal.stop().result()
+
+    # Or let the portal stop and join its thread on exit
+    with create_portal() as portal:
+        print(portal.call_sync(test, "WORLD", timeout=5))
+        print(portal.map(test, ["A", "B", "C"]))
     ```
     """
     portal = None
@@ -57,8 +177,150 @@ def create_portal() -> Portal:
 
     # -- Give each even a new thread so it's coroutine safe. --
     running_event = threading.Event()
-    thread = threading.Thread(target=run)
+    thread = threading.Thread(target=run, daemon=daemon)
     thread.start()
     running_event.wait()
 
     return portal
+
+
+_local = threading.local()
+
+
+class _ThreadPortal:
+    """
+    Owner of a cached portal. It's only referenced from the caller's thread-local
+    storage, which is cleared when that thread exits, and the portal is stopped
+    along with it.
+    """
+
+    def __init__(self) -> None:
+        self.portal = create_portal(daemon=True)
+
+        finalizer = weakref.finalize(self, self.portal.stop)
+        # Daemon threads die with the interpreter anyway.
+        finalizer.atexit = False
+
+
+def get_portal() -> Portal:
+    """
+    Return a portal cached for the calling thread, creating it on first use.
+
+    Sync callers which only need the odd coroutine run can use this instead of
+    paying for a new loop thread every time. The portal thread is a daemon, so a
+    cached portal never keeps the interpreter alive, and it's stopped once the
+    calling thread exits.
+    """
+    owner = getattr(_local, "owner", None)
+    if owner is None or owner.portal.closed:
+        owner = _local.owner = _ThreadPortal()
+    return owner.portal
+
+
+# -- Routing strategies for `PortalPool` --
+def round_robin(pool: "PortalPool", key: t.Any = None) -> Portal:
+    return next(pool._cycle)
+
+
+def least_loaded(pool: "PortalPool", key: t.Any = None) -> Portal:
+    # Calls already routed by an unfinished `call_many` count towards the load too.
+    return min(pool.portals, key=lambda portal: portal.pending + pool._planned.get(portal, 0))
+
+
+def key_affinity(pool: "PortalPool", key: t.Any = None) -> Portal:
+    if key is None:
+        return round_robin(pool)
+    return pool.portals[hash(key) % len(pool.portals)]
+
+
+ROUTERS = {
+    "round_robin": round_robin,
+    "least_loaded": least_loaded,
+    "key": key_affinity,
+}
+
+
+class PortalPool:
+    """
+    Usage Documentation:
+
+    ```
+    # It'll run 4 event loops, each in its own thread
+    pool = PortalPool(4, routing="least_loaded")
+
+    print(pool.call(test, "WORLD").result())
+
+    # Calls with the same key always land on the same loop
+    pool.call_with_key("user:1", test, "WORLD")
+
+    # One wakeup per loop for the whole batch
+    futures = pool.call_many([(test, "A"), (test, "B"), (test, "C")])
+
+    pool.stop()
+    ```
+    """
+
+    def __init__(
+        self,
+        size: t.Optional[int] = None,
+        routing: t.Union[str, t.Callable[["PortalPool", t.Any], Portal]] = "round_robin",
+    ) -> None:
+        if size is None:
+            size = os.cpu_count() or 1
+        if size < 1:
+            raise ValueError("size must be greater than 0.")
+
+        if isinstance(routing, str):
+            try:
+                routing = ROUTERS[routing]
+            except KeyError:
+                raise ValueError(f"Unknown routing {routing!r}, expected one of {list(ROUTERS)}.") from None
+
+        self.routing = routing
+        self.portals = [create_portal() for _ in range(size)]
+        self._cycle = itertools.cycle(self.portals)
+        self._planned = {}
+        self._planned_lock = threading.Lock()
+
+    def call(self, fn: t.Callable, *args, **kwargs) -> concurrent.futures.Future:
+        return self.routing(self, None).call(fn, *args, **kwargs)
+
+    def call_with_key(self, key: t.Any, fn: t.Callable, *args, **kwargs) -> concurrent.futures.Future:
+        return self.routing(self, key).call(fn, *args, **kwargs)
+
+    def call_many(self, calls: t.Iterable[t.Sequence], key: t.Any = None) -> t.List[concurrent.futures.Future]:
+        """Route each `(fn, *args)` call, then hand every portal its share of the batch at once."""
+        calls = list(calls)
+        batches = {}
+
+        # Nothing is tracked until the batches are submitted, so count each routed call as
+        # planned load right away, or a load aware router would send the whole batch to one portal.
+        with self._planned_lock:
+            for index, call in enumerate(calls):
+                portal = self.routing(self, key)
+                batches.setdefault(portal, []).append((index, call))
+                self._planned[portal] = self._planned.get(portal, 0) + 1
+
+        futures = [None] * len(calls)
+        try:
+            for portal, batch in batches.items():
+                for (index, _), future in zip(batch, portal.call_many(call for _, call in batch)):
+                    futures[index] = future
+        finally:
+            with self._planned_lock:
+                for portal, batch in batches.items():
+                    self._planned[portal] -= len(batch)
+
+        return futures
+
+    def __enter__(self) -> "PortalPool":
+        return self
+
+    def __exit__(self, type: t.Any, value: t.Any, traceback: t.Any) -> None:
+        for future in self.stop(cancel_pending=type is not None):
+            future.result()
+        for portal in self.portals:
+            portal.join()
+
+    def stop(self, cancel_pending: bool = False) -> t.List[concurrent.futures.Future]:
+        return [portal.stop(cancel_pending) for portal in self.portals]
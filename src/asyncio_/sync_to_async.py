@@ -1,15 +1,196 @@
 import asyncio
+import threading
 import time
 import typing as t
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from functools import partial, wraps
 
 
-def async_wrap(func: t.Callable) -> None:
+class ExecutorSaturated(RuntimeError):
+    """Raised by a profile with the `reject` policy when its queue is full."""
+
+
+class ExecutorStats:
+    def __init__(self) -> None:
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait = 0.0
+        self.run_time = 0.0
+        self.max_queue_wait = 0.0
+
+    def record(self, queue_wait: float, run_time: float) -> None:
+        self.completed += 1
+        self.queue_wait += queue_wait
+        self.run_time += run_time
+        self.max_queue_wait = max(self.max_queue_wait, queue_wait)
+
+    @property
+    def mean_queue_wait(self) -> float:
+        return self.queue_wait / self.completed if self.completed else 0.0
+
+    @property
+    def mean_run_time(self) -> float:
+        return self.run_time / self.completed if self.completed else 0.0
+
+
+class ExecutorProfile:
+    """
+    A named, bounded executor for `async_wrap`.
+
+    At most `max_workers + max_queue` calls are in flight at once. Past that, the
+    `wait` policy parks callers until a slot frees up and `reject` raises
+    `ExecutorSaturated` right away. Slots are handed over across event loops, so
+    one profile can be shared by several threads running their own loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: t.Optional[int] = None,
+        max_queue: int = 0,
+        policy: str = "wait",
+        process: bool = False,
+    ) -> None:
+        if policy not in ("wait", "reject"):
+            raise ValueError("policy must be either 'wait' or 'reject'.")
+
+        executor_cls = ProcessPoolExecutor if process else ThreadPoolExecutor
+        self.executor = executor_cls(max_workers)
+        self.name = name
+        self.policy = policy
+        self.process = process
+        self.capacity = self.executor._max_workers + max_queue
+        self.stats = ExecutorStats()
+
+        self._in_flight = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight < self.capacity and not self._waiters:
+                self._in_flight += 1
+                return
+
+            if self.policy == "reject":
+                self.stats.rejected += 1
+                raise ExecutorSaturated(f"Executor profile {self.name!r} is saturated.")
+
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+
+            # Cancelled after `_wake` handed the slot over, but before this task resumed.
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _wake(self, waiter: asyncio.Future) -> None:
+        # The waiter got cancelled after the slot was handed over, pass it on.
+        if waiter.done():
+            self._release()
+        else:
+            waiter.set_result(None)
+
+    def _release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._in_flight -= 1
+                return
+
+            loop, waiter = self._waiters.popleft()
+
+        loop.call_soon_threadsafe(self._wake, waiter)
+
+    async def run(self, loop: asyncio.AbstractEventLoop, func: t.Callable, *args, **kwargs) -> t.Any:
+        submitted = time.monotonic()
+        await self._acquire()
+        try:
+            started, result, exc = await loop.run_in_executor(
+                self.executor, partial(_timed_call, func, args, kwargs)
+            )
+        finally:
+            self._release()
+
+        self.stats.record(started - submitted, time.monotonic() - started)
+        if exc is not None:
+            raise exc
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait)
+
+
+def _timed_call(func: t.Callable, args: tuple, kwargs: dict) -> t.Tuple[float, t.Any, t.Optional[Exception]]:
+    # Module level, so it can be pickled over to a process pool.
+    started = time.monotonic()
+    try:
+        return started, func(*args, **kwargs), None
+    except Exception as exc:
+        return started, None, exc
+
+
+_profiles: t.Dict[str, ExecutorProfile] = {}
+
+
+def register_executor(name: str, **options) -> ExecutorProfile:
+    if name in _profiles:
+        raise ValueError(f"Executor profile {name!r} is already registered.")
+
+    profile = _profiles[name] = ExecutorProfile(name, **options)
+    return profile
+
+
+def get_executor(name: str) -> ExecutorProfile:
+    try:
+        return _profiles[name]
+    except KeyError:
+        if name != "process":
+            raise
+        return register_executor("process", process=True)
+
+
+def async_wrap(
+    func: t.Optional[t.Callable] = None,
+    *,
+    profile: t.Union[str, ExecutorProfile, None] = None,
+    process: bool = False,
+) -> t.Callable:
+    """
+    Turn a blocking function into a coroutine function run in an executor.
+
+    Without a `profile` the call goes to the loop's default executor, or the one given
+    with `executor=` at call time. `process=True` runs it in the shared `process`
+    profile. Functions sent to a process pool must be picklable, so wrap them with
+    `async_wrap(func, process=True)` rather than decorating them in place.
+    """
+    if func is None:
+        return partial(async_wrap, profile=profile, process=process)
+
+    if profile is None and process:
+        profile = "process"
+
     @wraps(func)
     async def run(*args, loop: t.Any = None, executor: t.Any = None, **kwargs) -> t.Any:
         if loop is None:
             loop = asyncio.get_event_loop()
 
+        if profile is not None and executor is None:
+            selected = get_executor(profile) if isinstance(profile, str) else profile
+            return await selected.run(loop, func, *args, **kwargs)
+
         pfunc = partial(func, *args, **kwargs)
         return await loop.run_in_executor(executor, pfunc)
 
@@ -25,3 +206,16 @@ async_sleep = async_wrap(time.sleep)
 @async_wrap
 def my_async_sleep(duration: int) -> None:
     time.sleep(duration)
+
+
+# Bounded profile, at most 4 running and 16 queued calls
+register_executor("io", max_workers=4, max_queue=16, policy="wait")
+
+
+@async_wrap(profile="io")
+def bounded_sleep(duration: int) -> None:
+    time.sleep(duration)
+
+
+# CPU heavy work in a process pool
+cpu_sum = async_wrap(sum, process=True)
@@ -1,11 +1,144 @@
 import asyncio
 import datetime
+import heapq
 import inspect
+import random
+import socket
 import sys
+import time
 import traceback
 import typing as t
+from collections import deque
+from itertools import count as counter
 
-from src.algorithm.backoff import ExponentialBackoff
+from src.algorithm.backoff import Backoff, make_backoff
+from src.algorithm.cron import CronSchedule
+
+
+MAX_ASYNCIO_SECONDS = 3456000
+OVERLAP_POLICIES = (None, "skip", "queue")
+
+
+class LoopScheduler:
+    """
+    Shared timer heap which wakes many `Loop` instances from a single timer handle.
+
+    Every sleeping loop parks on a plain future keyed by its deadline on the
+    event loop's monotonic clock, and only the earliest deadline holds a timer.
+    Futures cancelled along with their loop are compacted away once they make up
+    half of the heap, rather than lingering until their deadline.
+    """
+
+    def __init__(self, loop: t.Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.loop = loop
+        self._heap = []
+        self._counter = counter()
+        self._handle = None
+        self._cancelled = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _arm(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        heap = self._heap
+        while heap and heap[0][2].cancelled():
+            heapq.heappop(heap)
+
+        if heap:
+            deadline = min(self._heap[0][0], self.loop.time() + MAX_ASYNCIO_SECONDS)
+            self._handle = self.loop.call_at(deadline, self._fire)
+
+    def _fire(self) -> None:
+        self._handle = None
+        now = self.loop.time()
+
+        while self._heap and self._heap[0][0] <= now:
+            _, _, future, result = heapq.heappop(self._heap)
+            if not future.done():
+                future.set_result(result)
+
+        self._arm()
+
+    def _discard(self, future: asyncio.Future) -> None:
+        if not future.cancelled():
+            return
+
+        # The count may include entries `_arm` already popped, which only makes compaction a bit eager.
+        self._cancelled += 1
+        if self._cancelled * 2 >= len(self._heap):
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled()]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+            self._arm()
+
+    def sleep(self, delay: float, result: t.Any = None) -> asyncio.Future:
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+
+        future = self.loop.create_future()
+        deadline = self.loop.time() + max(delay, 0)
+        heapq.heappush(self._heap, (deadline, next(self._counter), future, result))
+        future.add_done_callback(self._discard)
+
+        if self._handle is None or deadline < self._handle.when():
+            self._arm()
+
+        return future
+
+    def sleep_until(self, when: datetime.datetime, result: t.Any = None) -> asyncio.Future:
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=datetime.timezone.utc)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return self.sleep((when - now).total_seconds(), result)
+
+
+class IterationStats(t.NamedTuple):
+    started: float
+    duration: float
+    drift: float
+    failed: bool
+
+
+class LoopStats:
+    """Ring buffer of the latest iteration timings of a `Loop`, plus running counters."""
+
+    def __init__(self, size: int = 128) -> None:
+        self.records = deque(maxlen=size)
+        self.iterations = 0
+        self.failures = 0
+        self.backoffs = 0
+        self.backoff_time = 0.0
+
+    def add(self, record: IterationStats) -> None:
+        self.records.append(record)
+        self.iterations += 1
+        if record.failed:
+            self.failures += 1
+
+    def add_backoff(self, delay: float) -> None:
+        self.backoffs += 1
+        self.backoff_time += delay
+
+    @property
+    def durations(self) -> t.List[float]:
+        return [record.duration for record in self.records]
+
+    @property
+    def drifts(self) -> t.List[float]:
+        return [record.drift for record in self.records]
+
+    @property
+    def mean_duration(self) -> float:
+        return sum(self.durations) / len(self.records) if self.records else 0.0
+
+    @property
+    def max_drift(self) -> float:
+        return max(self.drifts, default=0.0)
 
 
 class Loop:
@@ -18,10 +151,23 @@ class Loop:
         count: int,
         reconnect: bool,
         loop: asyncio.Task,
+        scheduler: t.Optional[LoopScheduler] = None,
+        overlap: t.Optional[str] = None,
+        max_concurrency: int = 1,
+        stats: int = 0,
+        time: t.Optional[t.Sequence[datetime.time]] = None,
+        cron: t.Optional[t.Union[str, CronSchedule]] = None,
+        jitter: float = 0.0,
+        jitter_key: t.Optional[str] = None,
+        backoff: t.Union[Backoff, t.Callable[[], Backoff], None] = None,
     ):
         self.coro = coro
         self.reconnect = reconnect
         self.loop = loop
+        self.scheduler = scheduler
+        self.backoff = backoff
+        self.overlap = overlap
+        self.max_concurrency = max_concurrency
         self.count = count
         self._current_loop = 0
         self._task = None
@@ -34,10 +180,30 @@ class Loop:
         self._has_failed = False
         self._stop_next_iteration = False
 
+        self._running = set()
+        self._overlap_error = None
+        self._overlap_retry = None
+        self._dropped_ticks = 0
+        self._coalesced_ticks = 0
+
+        self._stats_size = stats
+        self.stats = LoopStats(stats) if stats else None
+        self._on_iteration = None
+
         if self.count is not None and self.count <= 0:
             raise ValueError("count must be greater than 0 or None.")
 
-        self.change_interval(seconds=seconds, minutes=minutes, hours=hours)
+        if self.overlap not in OVERLAP_POLICIES:
+            raise ValueError(
+                "overlap must be one of {0!r}.".format(OVERLAP_POLICIES)
+            )
+
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0.")
+
+        self.change_interval(
+            seconds=seconds, minutes=minutes, hours=hours, time=time, cron=cron
+        )
         self._last_iteration_failed = False
         self._last_iteration = None
         self._next_iteration = None
@@ -49,6 +215,8 @@ class Loop:
                 )
             )
 
+        self.set_jitter(jitter, key=jitter_key)
+
     async def _call_loop_function(self, name: str, *args, **kwargs):
         coro = getattr(self, "_" + name)
         if coro is None:
@@ -60,27 +228,43 @@ class Loop:
             await coro(*args, **kwargs)
 
     async def _loop(self, *args, **kwargs):
-        backoff = ExponentialBackoff()
+        backoff = make_backoff(self.backoff)
         await self._call_loop_function("before_loop")
         self._last_iteration_failed = False
-        self._next_iteration = datetime.datetime.now(datetime.timezone.utc)
+        self._next_iteration = self._get_first_iteration()
         try:
-            await asyncio.sleep(0)
+            await self._sleep_until(self._next_iteration)
             while True:
                 if not self._last_iteration_failed:
                     self._last_iteration = self._next_iteration
                     self._next_iteration = self._get_next_sleep_time()
                 try:
-                    await self.coro(*args, **kwargs)
+                    if self.overlap is None:
+                        if self.stats is not None or self._on_iteration is not None:
+                            await self._timed_iteration(*args, **kwargs)
+                        else:
+                            await self.coro(*args, **kwargs)
+                    else:
+                        await self._dispatch_iteration(*args, **kwargs)
                     self._last_iteration_failed = False
                     now = datetime.datetime.now(datetime.timezone.utc)
                     if now > self._next_iteration:
-                        self._next_iteration = now
+                        if self._schedule is not None:
+                            # Never run outside the schedule, skip to its next slot instead.
+                            self._next_iteration = self._schedule(now - self._offset) + self._offset
+                        else:
+                            if self._sleep:
+                                late = (now - self._next_iteration).total_seconds()
+                                self._coalesced_ticks += int(late // self._sleep)
+                            self._next_iteration = now
                 except self._valid_exception:
                     self._last_iteration_failed = True
                     if not self.reconnect:
                         raise
-                    await asyncio.sleep(backoff.delay())
+                    delay = backoff.delay()
+                    if self.stats is not None:
+                        self.stats.add_backoff(delay)
+                    await self._sleep_for(delay)
                 else:
                     if self._stop_next_iteration:
                         return
@@ -88,7 +272,7 @@ class Loop:
                     if self._current_loop == self.count:
                         break
 
-                    await sleep_until(self._next_iteration)
+                    await self._sleep_until(self._next_iteration)
         except asyncio.CancelledError:
             self._is_being_cancelled = True
             raise
@@ -97,12 +281,105 @@ class Loop:
             await self._call_loop_function("error", exc)
             raise exc
         finally:
+            failure = await self._drain_iterations()
+            self._overlap_retry = None
             await self._call_loop_function("after_loop")
             self._is_being_cancelled = False
             self._current_loop = 0
             self._stop_next_iteration = False
             self._has_failed = False
 
+            # An iteration failing after the last tick fails the task, like it does inline.
+            if failure is not None:
+                raise failure
+
+    async def _timed_iteration(self, *args, **kwargs) -> None:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        drift = (now - self._last_iteration).total_seconds()
+        started = time.perf_counter()
+
+        try:
+            await self.coro(*args, **kwargs)
+        except Exception:
+            self._record_iteration(started, drift, failed=True)
+            raise
+
+        self._record_iteration(started, drift, failed=False)
+
+    def _record_iteration(self, started: float, drift: float, *, failed: bool) -> None:
+        record = IterationStats(started, time.perf_counter() - started, drift, failed)
+
+        if self.stats is not None:
+            self.stats.add(record)
+        if self._on_iteration is not None:
+            self._on_iteration(record)
+
+    def _raise_overlap_error(self) -> None:
+        if self._overlap_error is not None:
+            exc, self._overlap_error = self._overlap_error, None
+            raise exc
+
+        # Raised into the loop body, so a failing iteration backs off exactly like it does inline.
+        if self._overlap_retry is not None:
+            exc, self._overlap_retry = self._overlap_retry, None
+            raise exc
+
+    async def _dispatch_iteration(self, *args, **kwargs) -> None:
+        self._raise_overlap_error()
+
+        if len(self._running) >= self.max_concurrency:
+            if self.overlap == "skip":
+                self._dropped_ticks += 1
+                return
+
+            while len(self._running) >= self.max_concurrency:
+                await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+            self._raise_overlap_error()
+
+        if self.stats is not None or self._on_iteration is not None:
+            task = self.loop.create_task(self._timed_iteration(*args, **kwargs))
+        else:
+            task = self.loop.create_task(self.coro(*args, **kwargs))
+        self._running.add(task)
+        task.add_done_callback(self._iteration_done)
+
+    def _iteration_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if task.cancelled():
+            return
+
+        exc = task.exception()
+        if exc is None or self._overlap_error is not None:
+            return
+
+        # Mirror the inline behaviour: handled exceptions back off and retry on the next
+        # tick when reconnecting, everything else stops the loop and goes through `error`.
+        if self.reconnect and isinstance(exc, self._valid_exception):
+            if self._overlap_retry is None:
+                self._overlap_retry = exc
+        else:
+            self._overlap_error = exc
+
+    async def _drain_iterations(self) -> t.Optional[Exception]:
+        """Wait for the iterations still running, returning the error the task should fail with."""
+        if not self._running:
+            return None
+
+        if self._is_being_cancelled or self._has_failed:
+            for task in self._running:
+                task.cancel()
+
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+        if self._overlap_error is not None and not self._has_failed:
+            exc, self._overlap_error = self._overlap_error, None
+            self._has_failed = True
+            await self._call_loop_function("error", exc)
+            if not self._is_being_cancelled:
+                return exc
+
+        return None
+
     def __get__(self, obj: t.Any, objtype: t.Any) -> t.Any:
         if obj is None:
             return self
@@ -115,11 +392,21 @@ class Loop:
             count=self.count,
             reconnect=self.reconnect,
             loop=self.loop,
+            scheduler=self.scheduler,
+            overlap=self.overlap,
+            max_concurrency=self.max_concurrency,
+            stats=self._stats_size,
+            time=self.time,
+            cron=self.cron,
+            jitter=self.jitter,
+            jitter_key=self.jitter_key,
+            backoff=self.backoff,
         )
         copy._injected = obj
         copy._before_loop = self._before_loop
         copy._after_loop = self._after_loop
         copy._error = self._error
+        copy._on_iteration = self._on_iteration
         setattr(obj, self.coro.__name__, copy)
         return copy
 
@@ -127,6 +414,14 @@ class Loop:
     def current_loop(self) -> int:
         return self._current_loop
 
+    @property
+    def dropped_ticks(self) -> int:
+        return self._dropped_ticks
+
+    @property
+    def coalesced_ticks(self) -> int:
+        return self._coalesced_ticks
+
     @property
     def next_iteration(self) -> t.Optional[datetime.datetime]:
         if self._task is None:
@@ -253,25 +548,118 @@ class Loop:
         self._error = coro
         return coro
 
-    def _get_next_sleep_time(self) -> int:
-        return self._last_iteration + datetime.timedelta(seconds=self._sleep)
+    def on_iteration(self, func: t.Callable[[IterationStats], t.Any]) -> t.Callable:
+        if not callable(func):
+            raise TypeError(
+                "Expected callable, received {0.__name__!r}.".format(type(func))
+            )
+
+        self._on_iteration = func
+        return func
+
+    def _sleep_for(self, delay: float) -> t.Awaitable:
+        if self.scheduler is not None:
+            return self.scheduler.sleep(delay)
+        return asyncio.sleep(delay)
+
+    def _sleep_until(self, when: datetime.datetime) -> t.Awaitable:
+        if self.scheduler is not None:
+            return self.scheduler.sleep_until(when)
+        return sleep_until(when)
+
+    def _get_first_iteration(self) -> datetime.datetime:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if self._schedule is None:
+            return now + self._offset
+
+        return self._schedule(now - self._offset) + self._offset
+
+    def _get_next_sleep_time(self) -> datetime.datetime:
+        if self._schedule is None:
+            return self._last_iteration + datetime.timedelta(seconds=self._sleep)
+
+        # Offsets are applied on top of the schedule, so strip it before looking up the next slot.
+        return self._schedule(self._last_iteration - self._offset) + self._offset
 
     def change_interval(
-        self, *, seconds: int = 0, minutes: int = 0, hours: int = 0
+        self,
+        *,
+        seconds: int = 0,
+        minutes: int = 0,
+        hours: int = 0,
+        time: t.Optional[t.Sequence[datetime.time]] = None,
+        cron: t.Optional[t.Union[str, CronSchedule]] = None,
     ) -> None:
         sleep = seconds + (minutes * 60.0) + (hours * 3600.0)
         if sleep < 0:
             raise ValueError("Total number of seconds cannot be less than zero.")
 
+        if (time is not None) + (cron is not None) + bool(sleep) > 1:
+            raise ValueError("Only one of an interval, time or cron can be used.")
+
+        if cron is not None:
+            if isinstance(cron, str):
+                cron = CronSchedule(cron)
+            self._schedule = cron.next_after
+        elif time is not None:
+            if isinstance(time, datetime.time):
+                time = [time]
+            if not time:
+                raise ValueError("time must contain at least one datetime.time.")
+            times = list(time)
+            self._schedule = lambda when: _next_time_after(times, when)
+        else:
+            self._schedule = None
+
         self._sleep = sleep
         self.seconds = seconds
         self.hours = hours
         self.minutes = minutes
+        self.time = time
+        self.cron = cron
+
+    def set_jitter(self, jitter: float, *, key: t.Optional[str] = None) -> None:
+        """
+        Shift every fire time by a fixed offset between 0 and `jitter` seconds.
+
+        The offset is derived from `key`, which defaults to the host name and the
+        coroutine name, so it stays the same across restarts of one replica while
+        differing between replicas that would otherwise all fire at once.
+        """
+        if jitter < 0:
+            raise ValueError("jitter cannot be less than zero.")
+
+        if key is None:
+            key = f"{socket.gethostname()}:{self.coro.__module__}.{self.coro.__qualname__}"
+
+        self.jitter = jitter
+        self.jitter_key = key
+        self._offset = datetime.timedelta(
+            seconds=random.Random(key).uniform(0, jitter) if jitter else 0
+        )
 
 
-async def sleep_until(when: datetime.datetime, result: t.Any = None) -> t.Any:
-    MAX_ASYNCIO_SECONDS = 3456000
+def _on_date(date: datetime.date, when: datetime.time) -> datetime.datetime:
+    # Naive times are UTC, aware ones are placed on `date` in their own zone, so a zone
+    # with daylight saving time keeps firing at the same wall clock time all year.
+    if when.tzinfo is None:
+        return datetime.datetime.combine(date, when, tzinfo=datetime.timezone.utc)
+    return datetime.datetime.combine(date, when).astimezone(datetime.timezone.utc)
+
+
+def _next_time_after(times: t.List[datetime.time], when: datetime.datetime) -> datetime.datetime:
+    when = when.astimezone(datetime.timezone.utc)
 
+    # Local dates may be a day off from the UTC one, the window covers every zone.
+    dates = [when.date() + datetime.timedelta(days=days) for days in range(-1, 3)]
+    return min(
+        fire_time
+        for fire_time in (_on_date(date, time_) for date in dates for time_ in times)
+        if fire_time > when
+    )
+
+
+async def sleep_until(when: datetime.datetime, result: t.Any = None) -> t.Any:
     if when.tzinfo is None:
         when = when.replace(tzinfo=datetime.timezone.utc)
 
@@ -292,8 +680,34 @@ def loop(
     hours: int = 0,
     count: t.Any = None,
     reconnect: bool = True,
-    loop: asyncio.Task = None
+    loop: asyncio.Task = None,
+    scheduler: t.Optional[LoopScheduler] = None,
+    overlap: t.Optional[str] = None,
+    max_concurrency: int = 1,
+    stats: int = 0,
+    time: t.Optional[t.Sequence[datetime.time]] = None,
+    cron: t.Optional[t.Union[str, CronSchedule]] = None,
+    jitter: float = 0.0,
+    jitter_key: t.Optional[str] = None,
+    backoff: t.Union[Backoff, t.Callable[[], Backoff], None] = None
 ) -> t.Callable:
+    """
+    Usage Documentation:
+
+    ```
+    @loop(time=[datetime.time(9, tzinfo=ZoneInfo("Europe/Amsterdam"))])
+    async def morning_report():
+        ...
+
+    @loop(cron="*/15 * * * 1-5")
+    async def sync():
+        ...
+    ```
+
+    Runs the coroutine every `seconds`/`minutes`/`hours`, at the given `time`s of
+    day or following a `cron` expression. Naive `time`s are UTC, aware ones follow
+    their zone's daylight saving time. `cron` is always evaluated in UTC.
+    """
     def decorator(func: t.Callable) -> Loop:
         kwargs = {
             "seconds": seconds,
@@ -302,6 +716,15 @@ def loop(
             "count": count,
             "reconnect": reconnect,
             "loop": loop,
+            "scheduler": scheduler,
+            "overlap": overlap,
+            "max_concurrency": max_concurrency,
+            "stats": stats,
+            "time": time,
+            "cron": cron,
+            "jitter": jitter,
+            "jitter_key": jitter_key,
+            "backoff": backoff,
         }
         return Loop(func, **kwargs)
 
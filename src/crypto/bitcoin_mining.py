@@ -1,23 +1,218 @@
+import multiprocessing
+import os
+import struct
+import typing as t
 from hashlib import sha256
 
 MAX_NONCE = 100_000_000_000
 
+# version, previous block hash, merkle root, timestamp, bits, nonce. 80 bytes, little endian.
+HEADER = struct.Struct("<L32s32sLLL")
+UINT32 = struct.Struct("<L")
+NONCE_OFFSET = 76
+BITS_OFFSET = 72
+
+# How many nonces a worker tries between two looks at the cancel event.
+CHECK_EVERY = 4096
+
 
 def to_sha256(text: str) -> str:
     return sha256(text.encode("ascii")).hexdigest()
 
 
+def difficulty_target(prefix_zeros: int) -> bytes:
+    """
+    Digests below this value start with `prefix_zeros` hex zeros.
+
+    Equal length bytes compare like big endian integers, so the check is a single
+    comparison on the raw digest instead of hex encoding it.
+    """
+    if prefix_zeros <= 0:
+        return b"\xff" * 33  # Longer than any digest, so everything passes.
+
+    return (16 ** (64 - prefix_zeros)).to_bytes(32, "big")
+
+
+def _search(
+    prefix: bytes,
+    target: bytes,
+    start: int,
+    stop: int,
+    step: int = 1,
+    found: t.Optional[t.Any] = None,
+) -> t.Optional[t.Tuple[int, bytes]]:
+    # Hashing the constant prefix once, each nonce then only hashes its own digits.
+    state = sha256(prefix)
+    chunk = step * CHECK_EVERY
+
+    for base in range(start, stop, chunk):
+        if found is not None and found.is_set():
+            return None
+
+        for nonce in range(base, min(base + chunk, stop), step):
+            hasher = state.copy()
+            hasher.update(str(nonce).encode("ascii"))
+            digest = hasher.digest()
+
+            if digest < target:
+                return nonce, digest
+
+    return None
+
+
+def _search_worker(
+    prefix: bytes, target: bytes, start: int, stop: int, step: int, found: t.Any, results: t.Any
+) -> None:
+    result = _search(prefix, target, start, stop, step, found)
+    if result is not None:
+        found.set()
+    results.put(result)
+
+
+def _prefix(block_number: str, transactions: str, previous_hash: str) -> bytes:
+    return (str(block_number) + transactions + previous_hash).encode("ascii")
+
+
 def mine(
     block_number: str, transactions: str, previous_hash: str, prefix_zeros: int
 ) -> str:
-    prefix_str = "0" * prefix_zeros
+    result = _search(
+        _prefix(block_number, transactions, previous_hash), difficulty_target(prefix_zeros), 0, MAX_NONCE
+    )
+
+    if result is None:
+        raise Exception(f"Couldn't find correct has after trying {MAX_NONCE} times")
+
+    nonce, digest = result
+    print(f"Mined bitcoin with nonce: {nonce}")
+    return digest.hex()
+
+
+def mine_parallel(
+    block_number: str,
+    transactions: str,
+    previous_hash: str,
+    prefix_zeros: int,
+    processes: t.Optional[int] = None,
+) -> str:
+    """
+    Usage Documentation:
+
+    ```
+    if __name__ == "__main__":
+        print(mine_parallel(5, "Alice->Bob->20", "0000000xa036944e29568d0cff17edbe038f81208fecf9a66be9a2b8321c6ec7", 6))
+    ```
+
+    Worker `i` of `processes` tries the nonces `i, i + processes, i + 2 * processes...`,
+    and all of them stop as soon as one finds a valid hash. The nonce found is
+    valid, though not necessarily the smallest one like `mine` returns.
+    """
+    processes = processes or os.cpu_count() or 1
+    prefix = _prefix(block_number, transactions, previous_hash)
+    target = difficulty_target(prefix_zeros)
+
+    found = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_search_worker, args=(prefix, target, start, MAX_NONCE, processes, found, results), daemon=True
+        )
+        for start in range(processes)
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    try:
+        result = None
+        for _ in workers:
+            result = results.get()
+            if result is not None:
+                break
+    finally:
+        found.set()
+        for worker in workers:
+            worker.join()
+
+    if result is None:
+        raise Exception(f"Couldn't find correct has after trying {MAX_NONCE} times")
+
+    nonce, digest = result
+    print(f"Mined bitcoin with nonce: {nonce}")
+    return digest.hex()
+
+
+def double_sha256(data: bytes) -> bytes:
+    return sha256(sha256(data).digest()).digest()
+
+
+def bits_to_target(bits: int) -> int:
+    """Expand the compact `bits` header field, 1 exponent byte and 3 mantissa bytes."""
+    exponent, mantissa = bits >> 24, bits & 0x007FFFFF
+
+    if exponent <= 3:
+        return mantissa >> (8 * (3 - exponent))
+    return mantissa << (8 * (exponent - 3))
+
+
+def merkle_root(txids: t.Sequence[bytes]) -> bytes:
+    """
+    Merkle root of the transaction hashes, in the internal byte order used in headers.
+
+    Every level pairs up neighbours and double hashes them, duplicating the last
+    hash when a level has an odd count.
+    """
+    if not txids:
+        raise ValueError("A block needs at least one transaction.")
+
+    level = list(txids)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [double_sha256(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+
+    return level[0]
+
+
+def build_header(
+    version: int, previous_hash: bytes, merkle_root: bytes, timestamp: int, bits: int, nonce: int = 0
+) -> bytearray:
+    return bytearray(HEADER.pack(version, previous_hash, merkle_root, timestamp, bits, nonce))
+
+
+def mine_header(
+    header: bytearray, start: int = 0, stop: int = 2 ** 32, step: int = 1
+) -> t.Optional[t.Tuple[int, str]]:
+    """
+    Usage Documentation:
+
+    ```
+    header = build_header(1, bytes(32), merkle_root([coinbase_txid]), int(time.time()), 0x1F00FFFF)
+    nonce, block_hash = mine_header(header)
+    ```
+
+    Searches the 32-bit nonce range for a double SHA-256 of the 80-byte header at
+    or below the target encoded in its `bits`, like Bitcoin does. The nonce is
+    written in place into `header`, and the SHA-256 state of its first 64 bytes
+    (the midstate) is computed once, so each try only compresses the last 16
+    bytes before the second hash.
+
+    Returns the nonce and the block hash in the usual reversed hex form, or `None`
+    when the range is exhausted, at which point the caller should bump the
+    timestamp or the coinbase and try again.
+    """
+    target = bits_to_target(UINT32.unpack_from(header, BITS_OFFSET)[0])
+    midstate = sha256(header[:64])
+    tail = memoryview(header)[64:]
+
+    for nonce in range(start, stop, step):
+        UINT32.pack_into(header, NONCE_OFFSET, nonce)
 
-    for nonce in range(MAX_NONCE):
-        text = str(block_number) + transactions + previous_hash + str(nonce)
-        new_hash = to_sha256(text)
+        hasher = midstate.copy()
+        hasher.update(tail)
+        digest = sha256(hasher.digest()).digest()
 
-        if new_hash.startswith(prefix_str):
-            print(f"Mined bitcoin with nonce: {nonce}")
-            return new_hash
+        if int.from_bytes(digest, "little") <= target:
+            return nonce, digest[::-1].hex()
 
-    raise Exception(f"Couldn't find correct has after trying {MAX_NONCE} times")
+    return None
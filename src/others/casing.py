@@ -1,18 +1,57 @@
 import re
+import typing as t
+from functools import lru_cache
 
+CACHE_SIZE = 4096
 
+SNAKE_UNDERSCORE = re.compile(r"(?<=[0-9A-Za-z])_(?=[0-9A-Z])")
+CAMEL_BOUNDARY = re.compile(r"(?<=[a-zA-Z])(?=[0-9])|(?<=[a-z0-9])(?=[A-Z])")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
 def snake_to_camel(snake: str, start_lower: bool = False) -> str:
-    camel = snake.title()
-    camel = re.sub("([0-9A-Za-z])_(?=[0-9A-Z])", lambda m: m.group(1), camel)
+    camel = SNAKE_UNDERSCORE.sub("", snake.title())
 
     if start_lower:
-        camel = re.sub("(^_*[A-Z])", lambda m: m.group(1).lower(), camel)
+        # Lowercase the first letter after any leading underscores.
+        index = len(camel) - len(camel.lstrip("_"))
+        if index < len(camel) and "A" <= camel[index] <= "Z":
+            camel = camel[:index] + camel[index].lower() + camel[index + 1:]
 
     return camel
 
 
+@lru_cache(maxsize=CACHE_SIZE)
 def camel_to_snake(camel: str) -> str:
-    snake = re.sub(r"([a-zA-Z])([0-9])", lambda m: f"{m.group(1)}_{m.group(2)}", camel)
-    snake = re.sub(r"([a-z0-9])([A-Z])", lambda m: f"{m.group(1)}_{m.group(2)}", snake)
+    return CAMEL_BOUNDARY.sub("_", camel).lower()
+
+
+def convert_keys(data: t.Any, convert: t.Callable[[str], str]) -> t.Any:
+    """Rename the string keys of every dict in `data`, recursing into dicts, lists and tuples."""
+    if isinstance(data, dict):
+        return {
+            convert(key) if isinstance(key, str) else key: convert_keys(value, convert)
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return type(data)(convert_keys(item, convert) for item in data)
+
+    return data
+
+
+def keys_to_camel(data: t.Any, start_lower: bool = False) -> t.Any:
+    """
+    Usage Documentation:
+
+    ```
+    keys_to_camel([{"user_id": 1, "last_login": {"ip_address": "..."}}], start_lower=True)
+    # [{"userId": 1, "lastLogin": {"ipAddress": "..."}}]
+    ```
+    """
+    if start_lower:
+        return convert_keys(data, lambda key: snake_to_camel(key, True))
+    return convert_keys(data, snake_to_camel)
+
 
-    return snake.lower()
+def keys_to_snake(data: t.Any) -> t.Any:
+    return convert_keys(data, camel_to_snake)
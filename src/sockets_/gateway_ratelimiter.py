@@ -1,42 +1,220 @@
 import asyncio
+import fcntl
+import heapq
+import mmap
+import os
+import struct
 import time
+import typing as t
+from itertools import count as counter
+
+STATE = struct.Struct("<dq")
+
+
+def apply_take(
+    window: float, remaining: int, count: int, per: float, cost: int
+) -> t.Tuple[float, int, float]:
+    """Fixed window accounting shared by every backend, returns the new state and the delay."""
+    current = time.monotonic()
+
+    if current > window + per:
+        remaining = count
+
+    if remaining == count:
+        window = current
+
+    if remaining < cost:
+        return window, remaining, per - (current - window)
+
+    remaining -= cost
+    if remaining == 0:
+        window = current
+
+    return window, remaining, 0.0
+
+
+class LocalBackend:
+    """Keeps the window in the process, the default."""
+
+    def __init__(self) -> None:
+        self.window = 0.0
+        self.remaining = None
+
+    def state(self, count: int) -> t.Tuple[float, int]:
+        return self.window, count if self.remaining is None else self.remaining
+
+    def take(self, count: int, per: float, cost: int) -> float:
+        self.window, self.remaining, delay = apply_take(*self.state(count), count, per, cost)
+        return delay
+
+
+class SharedMemoryBackend:
+    """
+    Keeps the window in a memory mapped file, so every process opening the same
+    `path` shares one quota. Updates happen under an exclusive `flock`.
+
+    `time.monotonic` is system wide on Linux and macOS, which is what lets the
+    processes compare each other's timestamps. Put the file on a tmpfs such as
+    `/dev/shm` to keep it off the disk.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        # A zeroed state means an expired window, so a fresh file needs no other setup.
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < STATE.size:
+                os.ftruncate(self._fd, STATE.size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        self._map = mmap.mmap(self._fd, STATE.size)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    def state(self, count: int) -> t.Tuple[float, int]:
+        return STATE.unpack_from(self._map)
+
+    def take(self, count: int, per: float, cost: int) -> float:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            window, remaining, delay = apply_take(*STATE.unpack_from(self._map), count, per, cost)
+            STATE.pack_into(self._map, 0, window, remaining)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        return delay
 
 
 class GatewayRatelimiter:
-    def __init__(self, count: int = 110, per: float = 60.0) -> None:
+    """
+    Usage Documentation:
+
+    ```
+    ratelimiter = GatewayRatelimiter(count=120, per=60.0)
+
+    # Heartbeats skip ahead of everything queued with a higher priority number
+    await ratelimiter.acquire(priority=-1)
+
+    # Bulk sends which cost several slots at once
+    await ratelimiter.acquire(5)
+
+    # Take a slot only if one is free right now
+    if ratelimiter.try_acquire():
+        ...
+    ```
+
+    Waiters are served one at a time in (priority, arrival) order, and a single
+    timer wakes the head of the queue once its slots open up.
+
+    To share one quota between processes, give each of them the same backend file:
+
+    ```
+    ratelimiter = GatewayRatelimiter(120, 60.0, backend=SharedMemoryBackend("/dev/shm/gateway"))
+    ```
+    """
+
+    def __init__(
+        self,
+        count: int = 110,
+        per: float = 60.0,
+        *,
+        backend: t.Union[LocalBackend, SharedMemoryBackend, None] = None,
+    ) -> None:
         self.max = count
-        self.remaining = count
-        self.window = 0.0
         self.per = per
-        self.lock = asyncio.Lock()
+        self.backend = LocalBackend() if backend is None else backend
         self.shard_id = None
 
+        self._waiters = []
+        self._counter = counter()
+        self._timer = None
+
+    @property
+    def window(self) -> float:
+        return self.backend.state(self.max)[0]
+
+    @property
+    def remaining(self) -> int:
+        return self.backend.state(self.max)[1]
+
     def is_ratelimited(self) -> bool:
-        current = time.time()
-        if current > self.window + self.per:
+        window, remaining = self.backend.state(self.max)
+        if time.monotonic() > window + self.per:
             return False
-        return self.remaining == 0
+        return remaining == 0
+
+    def retry_after(self, cost: int = 1) -> float:
+        """Seconds until `cost` slots are free, without taking them."""
+        window, remaining = self.backend.state(self.max)
+        current = time.monotonic()
+        if current > window + self.per or remaining >= cost:
+            return 0.0
+        return self.per - (current - window)
+
+    def _take(self, cost: int) -> float:
+        return self.backend.take(self.max, self.per, cost)
 
     def get_delay(self) -> float:
-        current = time.time()
+        return self._take(1)
+
+    def _check_cost(self, cost: int) -> None:
+        if not 0 < cost <= self.max:
+            raise ValueError(f"cost must be between 1 and {self.max}.")
+
+    def try_acquire(self, cost: int = 1) -> bool:
+        """Take `cost` slots if they're free and nobody is queued ahead, without waiting."""
+        self._check_cost(cost)
+        if self._waiters:
+            return False
+        return not self._take(cost)
+
+    def _wake(self) -> None:
+        self._timer = None
+        waiters = self._waiters
+
+        while waiters:
+            _, _, cost, future = waiters[0]
+            if future.done():
+                heapq.heappop(waiters)
+                continue
+
+            delay = self._take(cost)
+            if delay:
+                self._timer = future.get_loop().call_later(delay, self._wake)
+                return
+
+            heapq.heappop(waiters)
+            future.set_result(None)
 
-        if current > self.window + self.per:
-            self.remaining = self.max
+    async def acquire(self, cost: int = 1, *, priority: int = 0) -> None:
+        """Wait for `cost` slots, lower `priority` values are served first."""
+        if self.try_acquire(cost):
+            return
 
-        if self.remaining == self.max:
-            self.window = current
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), cost, future))
 
-        if self.remaining == 0:
-            return self.per - (current - self.window)
+        # A new head of the queue might fit where the old one didn't, so check right away.
+        if self._timer is None or self._waiters[0][3] is future:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = loop.call_soon(self._wake)
 
-        self.remaining -= 1
-        if self.remaining == 0:
-            self.window = current
+        await future
 
-        return 0.0
+    async def wait_for_slot(self, cost: int = 1) -> None:
+        """Wait until `cost` slots are free, without taking them."""
+        self._check_cost(cost)
+        delay = self.retry_after(cost)
+        while delay:
+            await asyncio.sleep(delay)
+            delay = self.retry_after(cost)
 
     async def block(self) -> None:
-        async with self.lock:
-            delta = self.get_delay()
-            if delta:
-                await asyncio.sleep(delta)
+        await self.acquire()
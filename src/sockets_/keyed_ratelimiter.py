@@ -0,0 +1,175 @@
+import asyncio
+import time
+import typing as t
+from collections import OrderedDict, deque
+
+
+class TokenBucket:
+    """`rate` tokens refill per second, up to a burst of `capacity`."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def acquire(self, now: float, cost: float = 1) -> float:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class SlidingWindowLog:
+    """
+    At most `count` acquires in any `per` second window.
+
+    Timestamps are kept oldest first and expired ones are dropped from the front,
+    so each acquire is amortised O(1).
+    """
+
+    __slots__ = ("count", "per", "log")
+
+    def __init__(self, count: int, per: float, now: float) -> None:
+        self.count = count
+        self.per = per
+        self.log = deque()
+
+    def acquire(self, now: float, cost: float = 1) -> float:
+        log = self.log
+        while log and log[0] <= now - self.per:
+            log.popleft()
+
+        if len(log) + cost <= self.count:
+            log.extend([now] * int(cost))
+            return 0.0
+        return log[int(len(log) + cost - self.count) - 1] + self.per - now
+
+
+class GCRA:
+    """Generic cell rate algorithm, a single theoretical arrival time per key."""
+
+    __slots__ = ("interval", "tolerance", "tat")
+
+    def __init__(self, count: int, per: float, now: float) -> None:
+        self.interval = per / count
+        self.tolerance = per - self.interval
+        self.tat = now
+
+    def acquire(self, now: float, cost: float = 1) -> float:
+        tat = max(self.tat, now)
+        new_tat = tat + self.interval * cost
+
+        allowed_at = new_tat - self.interval - self.tolerance
+        if allowed_at > now:
+            return allowed_at - now
+
+        self.tat = new_tat
+        return 0.0
+
+
+ALGORITHMS = {
+    "token_bucket": lambda count, per, now: TokenBucket(count / per, count, now),
+    "sliding_window": SlidingWindowLog,
+    "gcra": GCRA,
+}
+
+
+class KeyedRatelimiter:
+    """
+    Usage Documentation:
+
+    ```
+    limiter = KeyedRatelimiter(count=120, per=60.0, algorithm="gcra")
+
+    # Waits until the bucket of `key` has room
+    await limiter.block(("shard", 3))
+
+    # Or check without waiting, returns the seconds left until it'd be allowed
+    if limiter.acquire("route:/messages"):
+        ...
+    ```
+
+    Buckets are created on first use and evicted once they went unused for
+    `idle_timeout` seconds, oldest first. Every operation runs on the monotonic
+    clock, and since nothing awaits while a bucket is updated no lock is needed.
+    """
+
+    def __init__(
+        self,
+        count: int = 110,
+        per: float = 60.0,
+        *,
+        algorithm: t.Union[str, t.Callable[[int, float, float], t.Any]] = "token_bucket",
+        idle_timeout: t.Optional[float] = None,
+    ) -> None:
+        if isinstance(algorithm, str):
+            try:
+                algorithm = ALGORITHMS[algorithm]
+            except KeyError:
+                raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {list(ALGORITHMS)}.") from None
+
+        # An evicted bucket comes back full, which is only right once a whole window passed.
+        if idle_timeout is not None and idle_timeout < per:
+            raise ValueError("idle_timeout can't be shorter than per.")
+
+        self.count = count
+        self.per = per
+        self.algorithm = algorithm
+        self.idle_timeout = per if idle_timeout is None else idle_timeout
+
+        # key -> (bucket, last used), least recently used first.
+        self._buckets = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        deadline = now - self.idle_timeout
+
+        while buckets:
+            _, last_used = next(iter(buckets.values()))
+            if last_used > deadline:
+                break
+            buckets.popitem(last=False)
+
+    def acquire(self, key: t.Hashable, cost: float = 1) -> float:
+        """Take `cost` from the bucket of `key`, returning 0 or the seconds to wait."""
+        if cost > self.count:
+            raise ValueError("cost can't be greater than count.")
+
+        now = time.monotonic()
+        self._evict(now)
+
+        entry = self._buckets.pop(key, None)
+        bucket = self.algorithm(self.count, self.per, now) if entry is None else entry[0]
+        self._buckets[key] = (bucket, now)
+
+        return bucket.acquire(now, cost)
+
+    def is_ratelimited(self, key: t.Hashable) -> bool:
+        entry = self._buckets.get(key)
+        if entry is None:
+            return False
+
+        bucket = entry[0]
+        if isinstance(bucket, TokenBucket):
+            now = time.monotonic()
+            return bucket.tokens + (now - bucket.updated) * bucket.rate < 1
+        if isinstance(bucket, GCRA):
+            return bucket.tat - bucket.tolerance > time.monotonic()
+
+        now = time.monotonic()
+        return sum(1 for stamp in bucket.log if stamp > now - bucket.per) >= bucket.count
+
+    async def block(self, key: t.Hashable, cost: float = 1) -> None:
+        delay = self.acquire(key, cost)
+        while delay:
+            await asyncio.sleep(delay)
+            delay = self.acquire(key, cost)
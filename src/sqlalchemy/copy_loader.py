@@ -0,0 +1,131 @@
+import time
+import typing as t
+import uuid
+
+import sqlalchemy as alchemy
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+
+from .custom_db_base import Base
+from .on_conflict import _update_columns
+from .query_cache import invalidate_rows
+
+Row = t.Union[t.Sequence[t.Any], t.Dict[str, t.Any]]
+
+
+class CopyReport(t.NamedTuple):
+    copied: int
+    merged: int
+    create_seconds: float
+    copy_seconds: float
+    merge_seconds: float
+
+    @property
+    def total_seconds(self) -> float:
+        return self.create_seconds + self.copy_seconds + self.merge_seconds
+
+
+def _as_records(rows: t.Iterable[Row], names: t.List[str]) -> t.Iterator[t.Sequence[t.Any]]:
+    for row in rows:
+        yield tuple(row[name] for name in names) if isinstance(row, dict) else row
+
+
+async def _as_async_records(
+    rows: t.AsyncIterable[Row], names: t.List[str]
+) -> t.AsyncIterator[t.Sequence[t.Any]]:
+    async for row in rows:
+        yield tuple(row[name] for name in names) if isinstance(row, dict) else row
+
+
+async def copy_upsert(
+    session: AsyncSession,
+    model: Base,
+    conflict_columns: list,
+    rows: t.Union[t.Iterable[Row], t.AsyncIterable[Row]],
+    *,
+    columns: t.Optional[t.List[str]] = None,
+    do_nothing: bool = False,
+    deduplicate: bool = True,
+) -> CopyReport:
+    """
+    Usage Documentation:
+
+    ```
+    def read_users():
+        with open("users.csv") as file:
+            for line in file:
+                user_id, name = line.rstrip().split(",")
+                yield int(user_id), name
+
+    async with session.begin():
+        report = await copy_upsert(session, User, ["id"], read_users(), columns=["id", "name"])
+    print(report.copied, report.merged, f"{report.total_seconds:.2f}s")
+    ```
+
+    Bulk version of `on_conflict` for PostgreSQL through asyncpg. The rows are
+    streamed with `COPY` into a temporary staging table, without being collected
+    in memory, then merged into the model's table with a single
+    `INSERT ... SELECT ... ON CONFLICT`. The staging table is dropped when the
+    transaction commits.
+
+    Rows are tuples in `columns` order, all the table's columns by default, or
+    dicts keyed by column name, from a sync or async iterable. With `deduplicate`
+    the last row wins when a conflict key repeats, like consecutive `on_conflict`
+    calls, instead of PostgreSQL refusing to update a row twice.
+    """
+    table = model.__table__
+    names = columns or [column.name for column in table.columns]
+
+    # Each call gets its own name, earlier staging tables only go away on commit.
+    staging = alchemy.Table(
+        f"{table.name}_staging_{uuid.uuid4().hex[:12]}",
+        alchemy.MetaData(),
+        *(alchemy.Column(name, table.c[name].type) for name in names),
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+
+    started = time.perf_counter()
+    connection = await session.connection()
+    # Only the table DDL, `staging.create` would also emit `CREATE TYPE` for enum columns.
+    await connection.execute(CreateTable(staging))
+    created = time.perf_counter()
+
+    raw_connection = await connection.get_raw_connection()
+    records = (
+        _as_async_records(rows, names) if hasattr(rows, "__aiter__") else _as_records(rows, names)
+    )
+    status = await raw_connection.driver_connection.copy_records_to_table(
+        staging.name, records=records, columns=names
+    )
+    copied_at = time.perf_counter()
+
+    select = alchemy.select(*(staging.c[name] for name in names))
+    if deduplicate:
+        # Physical order is the COPY order until the table gets updated.
+        select = select.distinct(*(staging.c[name] for name in conflict_columns)).order_by(
+            *(staging.c[name] for name in conflict_columns), alchemy.literal_column("ctid").desc()
+        )
+
+    stmt = postgresql.insert(table).from_select(names, select)
+    if do_nothing:
+        stmt = stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=conflict_columns, set_=_update_columns(stmt, names, conflict_columns)
+        )
+
+    result = await session.execute(stmt)
+    merged_at = time.perf_counter()
+
+    # The merged keys are only known to the database, so the whole model cache goes.
+    invalidate_rows(model, None, session)
+
+    return CopyReport(
+        copied=int(status.split()[-1]),
+        merged=result.rowcount,
+        create_seconds=created - started,
+        copy_seconds=copied_at - created,
+        merge_seconds=merged_at - copied_at,
+    )
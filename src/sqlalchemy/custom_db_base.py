@@ -1,22 +1,78 @@
 import typing as t
+from operator import attrgetter, itemgetter
 
 import sqlalchemy as alchemy
 from sqlalchemy.ext.declarative import DeclarativeMeta, declarative_base, declared_attr
 from sqlalchemy.sql.base import ImmutableColumnCollection
 
-from src.others.casing import camel_to_snake
+from src.others.casing import camel_to_snake, snake_to_camel
+from .query_cache import QueryCache
+
+KeySet = t.Optional[t.Collection[str]]
+
+
+def _column_getter(keys: t.Sequence[str]) -> t.Callable[[t.Any], t.Tuple[t.Any, ...]]:
+    if not keys:
+        return lambda instance: ()
+
+    # `attrgetter` and `itemgetter` return a bare value rather than a tuple for a single key.
+    if len(keys) == 1:
+        key = keys[0]
+        read_loaded = lambda state: (state[key],)
+        read = lambda instance: (getattr(instance, key),)
+    else:
+        read_loaded = itemgetter(*keys)
+        read = attrgetter(*keys)
+
+    def getter(instance: t.Any) -> t.Tuple[t.Any, ...]:
+        # Loaded columns sit in the instance dict, reading them there skips the
+        # instrumented attributes. Expired or deferred ones go through `getattr` to load.
+        try:
+            return read_loaded(instance.__dict__)
+        except KeyError:
+            return read(instance)
+
+    return getter
 
 
 class CustomMeta(DeclarativeMeta):
     __table__: alchemy.Table
 
+    def __init__(cls, classname: str, bases: tuple, dict_: dict, **kwargs) -> None:
+        super().__init__(classname, bases, dict_, **kwargs)
+
+        # Computed once per mapped class, instead of on every `dict()` call.
+        if getattr(cls, "__table__", None) is not None:
+            cls.__column_keys__ = tuple(cls.__table__.columns.keys())
+            cls.__column_getter__ = _column_getter(cls.__column_keys__)
+
     @property
     def columns(cls) -> ImmutableColumnCollection:
         return cls.__table__.columns
 
 
 class CustomBase:
+    """
+    Usage Documentation:
+
+    ```
+    user.dict(exclude={"password"}, camel=True)
+
+    users = (await session.execute(select(User))).scalars().all()
+    User.dicts(users, include={"id", "name"})
+    User.tuples(users)
+
+    # Skips building ORM instances altogether
+    User.core_dicts(await session.execute(select(User.__table__)))
+    ```
+    """
+
     __table__: alchemy.Table
+    __column_keys__: t.Tuple[str, ...]
+    __column_getter__: t.Callable[[t.Any], t.Tuple[t.Any, ...]]
+
+    # Set to a `QueryCache` to opt the model into `cached_get`.
+    __query_cache__: t.Optional[QueryCache] = None
 
     if t.TYPE_CHECKING:
         __tablename__: str
@@ -26,9 +82,60 @@ class CustomBase:
         def __tablename__(self) -> str:
             return camel_to_snake(self.__name__)
 
-    def dict(self) -> t.Dict[str, t.Any]:
-        data = {key: getattr(self, key) for key in self.__table__.columns.keys()}
-        return data
+    @classmethod
+    def _serializer(
+        cls, include: KeySet = None, exclude: KeySet = None, camel: bool = False
+    ) -> t.Tuple[t.Tuple[str, ...], t.Callable[[t.Any], t.Tuple[t.Any, ...]]]:
+        """The output keys and the getter returning the matching values of an instance."""
+        keys = cls.__column_keys__
+        getter = cls.__column_getter__
+
+        if include is not None or exclude is not None:
+            keys = tuple(
+                key for key in keys
+                if (include is None or key in include) and (exclude is None or key not in exclude)
+            )
+            getter = _column_getter(keys)
+
+        if camel:
+            keys = tuple(snake_to_camel(key, True) for key in keys)
+
+        return keys, getter
+
+    def dict(self, include: KeySet = None, exclude: KeySet = None, camel: bool = False) -> t.Dict[str, t.Any]:
+        keys, getter = self._serializer(include, exclude, camel)
+        return dict(zip(keys, getter(self)))
+
+    @classmethod
+    def dicts(
+        cls, rows: t.Iterable[t.Any], include: KeySet = None, exclude: KeySet = None, camel: bool = False
+    ) -> t.List[t.Dict[str, t.Any]]:
+        keys, getter = cls._serializer(include, exclude, camel)
+        return [dict(zip(keys, getter(row))) for row in rows]
+
+    @classmethod
+    def tuples(
+        cls, rows: t.Iterable[t.Any], include: KeySet = None, exclude: KeySet = None
+    ) -> t.List[t.Tuple[t.Any, ...]]:
+        _, getter = cls._serializer(include, exclude)
+        return [getter(row) for row in rows]
+
+    @staticmethod
+    def core_dicts(
+        result: t.Any, include: KeySet = None, exclude: KeySet = None, camel: bool = False
+    ) -> t.List[t.Dict[str, t.Any]]:
+        """Dicts straight from the rows of a Core `Result`, such as `select(Model.__table__)`."""
+        keys = list(result.keys())
+        indexes = [
+            index for index, key in enumerate(keys)
+            if (include is None or key in include) and (exclude is None or key not in exclude)
+        ]
+
+        names = [snake_to_camel(keys[index], True) if camel else keys[index] for index in indexes]
+        if len(indexes) == len(keys):
+            return [dict(zip(names, row)) for row in result]
+
+        return [dict(zip(names, [row[index] for index in indexes])) for row in result]
 
 
 _Base = declarative_base(cls=CustomBase, metaclass=CustomMeta)
@@ -1,26 +1,115 @@
-from sqlalchemy.dialects import postgresql
+import typing as t
+
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .custom_db_base import Base
+from .query_cache import invalidate_rows
 
+# Most bind parameters a single statement may carry.
+BIND_PARAMETER_LIMITS = {"postgresql": 32767, "sqlite": 999}
+INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
 
-async def on_conflict(
-    session: AsyncSession, model: Base, conflict_columns: list, values: dict
-) -> None:
-    table = model.__table__
-    stmt = postgresql.insert(table)
 
+def _update_columns(stmt: t.Any, columns: t.Iterable[str], conflict_columns: list) -> dict:
     affected_columns = {
         col.name: col
         for col in stmt.excluded
-        if col.name in values and col.name not in conflict_columns
+        if col.name in columns and col.name not in conflict_columns
     }
 
     if not affected_columns:
         raise ValueError("Couldn't find any columns to update.")
 
+    return affected_columns
+
+
+async def on_conflict(
+    session: AsyncSession, model: Base, conflict_columns: list, values: dict
+) -> None:
+    table = model.__table__
+    stmt = postgresql.insert(table)
+
     stmt = stmt.on_conflict_do_update(
-        index_elements=conflict_columns, set_=affected_columns
+        index_elements=conflict_columns, set_=_update_columns(stmt, values, conflict_columns)
     )
 
     await session.execute(stmt, values)
+    invalidate_rows(model, [values], session)
+
+
+async def on_conflict_many(
+    session: AsyncSession,
+    model: Base,
+    conflict_columns: list,
+    rows: t.Iterable[dict],
+    *,
+    do_nothing: bool = False,
+    where: t.Any = None,
+    dialect: str = "postgresql",
+) -> int:
+    """
+    Usage Documentation:
+
+    ```
+    await on_conflict_many(session, User, ["id"], users)
+
+    # Only overwrite rows which are older than the incoming ones
+    await on_conflict_many(
+        session, User, ["id"], users, where=lambda excluded: User.updated_at < excluded.updated_at
+    )
+
+    # Keep the existing rows untouched
+    await on_conflict_many(session, User, ["id"], users, do_nothing=True, dialect="sqlite")
+    ```
+
+    Upserts all `rows` with multi row `INSERT ... ON CONFLICT` statements. Rows are
+    grouped by their set of columns, the `ON CONFLICT` clause is built once per
+    group, and every statement is kept under the bind parameter limit of `dialect`.
+    `where` filters which conflicting rows get updated, pass a function to build it
+    from the `excluded` columns.
+
+    When a conflict key repeats within a group only its last row is sent, like
+    consecutive `on_conflict` calls, since PostgreSQL refuses to update the same
+    row twice in one statement.
+
+    Returns the number of rows inserted or updated.
+    """
+    if dialect not in INSERTS:
+        raise ValueError(f"Unsupported dialect {dialect!r}, expected one of {list(INSERTS)}.")
+    if do_nothing and where is not None:
+        raise ValueError("where only applies when updating conflicting rows.")
+
+    # columns -> conflict key -> row, the last row of a key replacing the earlier ones in place.
+    groups = {}
+    for row in rows:
+        key = tuple(row.get(name) for name in conflict_columns)
+        if None in key:
+            key = object()  # NULLs never conflict, so such rows are all kept.
+        groups.setdefault(tuple(sorted(row)), {})[key] = row
+
+    table = model.__table__
+    insert = INSERTS[dialect]
+    affected = 0
+
+    for columns, by_key in groups.items():
+        group = list(by_key.values())
+        stmt = insert(table)
+
+        if do_nothing:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_=_update_columns(stmt, columns, conflict_columns),
+                where=where(stmt.excluded) if callable(where) else where,
+            )
+
+        chunk_size = max(1, BIND_PARAMETER_LIMITS[dialect] // len(columns))
+        for start in range(0, len(group), chunk_size):
+            result = await session.execute(stmt.values(group[start:start + chunk_size]))
+            affected += result.rowcount
+
+        invalidate_rows(model, group, session)
+
+    return affected
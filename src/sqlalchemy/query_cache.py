@@ -0,0 +1,226 @@
+import itertools
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+# `session.info` key of the (model, primary key) pairs written by the session's transaction,
+# a `None` key standing for every row of the model.
+TOUCHED_KEY = "query_cache_touched"
+
+
+class QueryCache:
+    """
+    Usage Documentation:
+
+    ```
+    class Country(Base):
+        __query_cache__ = QueryCache(ttl=600, maxsize=512)
+
+        code = Column(String(2), primary_key=True)
+        name = Column(String)
+
+    country = await cached_get(session, Country, "NL")  # miss, loaded with `session.get`
+    country = await cached_get(session, Country, "NL")  # hit, no query
+    print(Country.__query_cache__.stats)
+    ```
+
+    Holds the column values of a model's rows by primary key, for `ttl` seconds
+    and at most `maxsize` rows, evicting the least recently used first. Entries
+    are dropped when a session flushes changes to them, and when rows are written
+    through `on_conflict`, `on_conflict_many` or `copy_upsert`.
+
+    Rows a transaction wrote are neither cached nor served from the cache by its
+    session until it commits or rolls back, their entries being dropped again then.
+    """
+
+    def __init__(self, ttl: float = 300.0, maxsize: int = 1024) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        # primary key tuple -> (expiry, column values), least recently used first.
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def stats(self) -> t.Dict[str, t.Union[int, float]]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+        }
+
+    def get(self, key: tuple) -> t.Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: tuple, values: tuple) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, values)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: t.Optional[tuple] = None) -> None:
+        """Drop the entry of `key`, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+
+def _identity(pk: t.Any) -> tuple:
+    return tuple(pk) if isinstance(pk, (tuple, list)) else (pk,)
+
+
+def _touched(session: t.Any, model: t.Any, key: tuple) -> bool:
+    touched = session.info.get(TOUCHED_KEY)
+    return bool(touched) and ((model, key) in touched or (model, None) in touched)
+
+
+def _snapshot(instance: t.Any) -> t.Optional[tuple]:
+    # Only instances with every column loaded and no pending changes are worth caching.
+    if inspect(instance).modified:
+        return None
+
+    state = instance.__dict__
+    try:
+        return tuple(state[key] for key in type(instance).__column_keys__)
+    except KeyError:
+        return None
+
+
+async def cached_get(session: AsyncSession, model: t.Any, pk: t.Any) -> t.Optional[t.Any]:
+    """`session.get(model, pk)` going through the model's `__query_cache__`, if it has one."""
+    cache = getattr(model, "__query_cache__", None)
+    if cache is None:
+        return await session.get(model, pk)
+
+    key = _identity(pk)
+    if _touched(session, model, key):
+        # The session sees its own uncommitted writes, which nobody else may be served.
+        return await session.get(model, key)
+    if inspect(model).identity_key_from_primary_key(key) in session.identity_map:
+        # Like `session.get`, the instance the session holds is returned with its pending changes.
+        return await session.get(model, key)
+
+    values = cache.get(key)
+
+    if values is None:
+        instance = await session.get(model, key)
+        if instance is not None:
+            snapshot = _snapshot(instance)
+            if snapshot is not None:
+                cache.set(key, snapshot)
+        return instance
+
+    # Rebuild a detached instance as if freshly loaded, `merge` then attaches it without a query.
+    instance = inspect(model).class_manager.new_instance()
+    for column_key, value in zip(model.__column_keys__, values):
+        set_committed_value(instance, column_key, value)
+    make_transient_to_detached(instance)
+
+    return await session.merge(instance, load=False)
+
+
+def invalidate_rows(
+    model: t.Any, rows: t.Optional[t.Iterable[dict]], session: t.Optional[t.Any] = None
+) -> None:
+    """
+    Drop the cached entries of `rows` written outside the ORM, keyed by column name,
+    or of every row of the model when `rows` is `None`. Pass the `session` which wrote
+    them to keep them out of the cache until its transaction ends.
+    """
+    cache = getattr(model, "__query_cache__", None)
+    if cache is None:
+        return
+
+    names = [column.name for column in model.__table__.primary_key.columns]
+    keys = {None} if rows is None else set()
+    for row in rows or ():
+        if not all(name in row for name in names):
+            keys = {None}
+            break
+        keys.add(tuple(row[name] for name in names))
+
+    for key in keys:
+        cache.invalidate(key)
+    if session is not None:
+        session.info.setdefault(TOUCHED_KEY, set()).update((model, key) for key in keys)
+
+
+def _invalidate_touched(session: Session, clear: bool) -> None:
+    touched = session.info.get(TOUCHED_KEY)
+    if not touched:
+        return
+
+    for model, key in touched:
+        model.__query_cache__.invalidate(key)
+    if clear:
+        touched.clear()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed(session: Session, flush_context: t.Any) -> None:
+    # `new`, `dirty` and `deleted` still hold their pre-flush contents at this point.
+    touched = session.info.setdefault(TOUCHED_KEY, set())
+
+    for instance in itertools.chain(session.new, session.dirty, session.deleted):
+        model = type(instance)
+        if getattr(model, "__query_cache__", None) is not None:
+            key = inspect(model).identity_key_from_instance(instance)[1]
+            model.__query_cache__.invalidate(key)
+            touched.add((model, key))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    # Other sessions may have cached the old values between the flush and the commit.
+    if not session.in_nested_transaction():
+        _invalidate_touched(session, clear=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _invalidate_rolled_back(session: Session) -> None:
+    _invalidate_touched(session, clear=False)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _invalidate_soft_rolled_back(session: Session, previous_transaction: t.Any) -> None:
+    # Rolling back a savepoint leaves the writes of the enclosing transaction in place.
+    _invalidate_touched(session, clear=previous_transaction.parent is None)
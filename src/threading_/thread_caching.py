@@ -1,4 +1,6 @@
 import typing as t
+from collections import deque
+from concurrent.futures import CancelledError, Executor, Future
 from itertools import count
 from threading import Lock, Thread
 
@@ -8,6 +10,16 @@ IDLE_TIMEOUT = 10
 name_counter = count()
 
 
+def _run_batch(fns: t.Sequence[t.Callable]) -> t.List[outcome.Outcome]:
+    results = []
+    append = results.append
+
+    for fn in fns:
+        append(outcome.capture(fn))
+
+    return results
+
+
 class WorkerThread:
     def __init__(self, thread_cache: t.Any) -> None:
         self._job = None
@@ -15,44 +27,200 @@ class WorkerThread:
         self._worker_lock = Lock()
         self._worker_lock.acquire()
 
-        thread = Thread(target=self._work, daemon=True)
-        thread.name = f"Worker thread {next(name_counter)}"
-        thread.start()
+        self.thread = Thread(target=self._work, daemon=True)
+        self.thread.name = f"Worker thread {next(name_counter)}"
+        self.thread.start()
 
     def _work(self) -> None:
+        cache = self._thread_cache
+
         while True:
-            if self._worker_lock.acquire(timeout=IDLE_TIMEOUT):
-                fn, deliver = self._job
+            if self._worker_lock.acquire(timeout=cache.idle_timeout):
+                job = self._job
                 self._job = None
-                result = outcome.capture(fn)
-                self._thread_cache._idle_workers[self] = None
-                deliver(result)
-                del fn
-                del deliver
-            else:
-                try:
-                    del self._thread_cache._idle_workers[self]
-                except KeyError:
-                    continue
-                else:
+
+                # Keep pulling queued jobs until there are none left, then go idle.
+                while job is not None:
+                    fn, deliver, batch = job
+                    result = _run_batch(fn) if batch else outcome.capture(fn)
+                    job = cache._job_done(self)
+                    deliver(result)
+                    del fn
+                    del deliver
+
+                if cache._shutdown:
                     return
+            elif cache._retire(self):
+                return
+
+
+class ThreadCache(Executor):
+    """
+    Cache of worker threads, which can also be used as a `concurrent.futures.Executor`.
 
+    At most `max_workers` threads are started, further jobs wait in a FIFO queue and
+    are picked up by the next worker to finish. Idle workers exit after `idle_timeout`
+    seconds, apart from `min_idle` of them which are kept warm.
+    """
+
+    def __init__(
+        self,
+        max_workers: t.Optional[int] = None,
+        *,
+        min_idle: int = 0,
+        idle_timeout: float = IDLE_TIMEOUT,
+    ) -> None:
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be greater than 0.")
+        if max_workers is not None and min_idle > max_workers:
+            raise ValueError("min_idle can't be greater than max_workers.")
+
+        self.max_workers = max_workers
+        self.min_idle = min_idle
+        self.idle_timeout = idle_timeout
 
-class ThreadCache:
-    def __init__(self) -> None:
         self._idle_workers = {}
+        self._workers = set()
+        self._queue = deque()
+        self._lock = Lock()
+        self._shutdown = False
+
+        with self._lock:
+            for _ in range(min_idle):
+                self._idle_workers[self._spawn()] = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    @property
+    def worker_count(self) -> int:
+        return len(self._workers)
+
+    def _spawn(self) -> WorkerThread:
+        worker = WorkerThread(self)
+        self._workers.add(worker)
+        return worker
+
+    def _job_done(self, worker: WorkerThread) -> t.Optional[t.Tuple[t.Any, t.Callable, bool]]:
+        with self._lock:
+            if self._queue:
+                return self._queue.popleft()
+
+            if self._shutdown:
+                self._workers.discard(worker)
+            else:
+                self._idle_workers[worker] = None
+            return None
+
+    def _retire(self, worker: WorkerThread) -> bool:
+        with self._lock:
+            # Someone popped this worker and is about to hand it a job.
+            if worker not in self._idle_workers:
+                return False
+            if len(self._idle_workers) <= self.min_idle and not self._shutdown:
+                return False
+
+            del self._idle_workers[worker]
+            self._workers.discard(worker)
+            return True
 
     def start_thread_soon(self, fn: t.Callable, deliver: t.Any) -> None:
-        try:
-            worker, _ = self._idle_workers.popitem()
-        except KeyError:
-            worker = WorkerThread(self)
-        worker._job = (fn, deliver)
+        self._start_job((fn, deliver, False))
+
+    def start_threads_soon_many(
+        self,
+        fns: t.Iterable[t.Callable],
+        deliver: t.Callable[[t.List[outcome.Outcome]], t.Any],
+        *,
+        batch_size: int = 64,
+    ) -> None:
+        """
+        Run many small callables, `batch_size` of them per worker handoff.
+
+        Each worker runs its whole batch before looking for more work and calls
+        `deliver` once per batch, with the outcomes in submission order.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than 0.")
+
+        fns = tuple(fns)
+        for start in range(0, len(fns), batch_size):
+            self._start_job((fns[start:start + batch_size], deliver, True))
+
+    def _start_job(self, job: t.Tuple[t.Any, t.Callable, bool]) -> None:
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Can't start new jobs after shutdown.")
+
+            try:
+                worker, _ = self._idle_workers.popitem()
+            except KeyError:
+                if self.max_workers is not None and len(self._workers) >= self.max_workers:
+                    self._queue.append(job)
+                    return
+                worker = self._spawn()
+
+        worker._job = job
         worker._worker_lock.release()
 
+    def submit(self, fn: t.Callable, *args, **kwargs) -> Future:
+        future = Future()
+
+        def run() -> t.Any:
+            if not future.set_running_or_notify_cancel():
+                raise CancelledError
+            return fn(*args, **kwargs)
+
+        def deliver(result: outcome.Outcome) -> None:
+            if future.cancelled():
+                return
+            if isinstance(result, outcome.Error):
+                if isinstance(result.error, CancelledError) and not future.running():
+                    future.cancel()
+                    future.set_running_or_notify_cancel()
+                else:
+                    future.set_exception(result.error)
+            else:
+                future.set_result(result.value)
+
+        self.start_thread_soon(run, deliver)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            workers = list(self._workers)
+
+            dropped = []
+            if cancel_futures:
+                dropped = list(self._queue)
+                self._queue.clear()
+
+            # Wake the idle workers up with no job, which makes them exit.
+            idle = list(self._idle_workers)
+            self._idle_workers.clear()
+            for worker in idle:
+                self._workers.discard(worker)
+
+        for worker in idle:
+            worker._worker_lock.release()
+
+        for fn, deliver, batch in dropped:
+            error = outcome.Error(CancelledError())
+            deliver([error] * len(fn) if batch else error)
+
+        if wait:
+            for worker in workers:
+                worker.thread.join()
+
 
 THREAD_CACHE = ThreadCache()
 
 
 def start_thread_soon(fn: t.Any, deliver: t.Any) -> None:
     THREAD_CACHE.start_thread_soon(fn, deliver)
+
+
+def start_threads_soon_many(fns: t.Iterable[t.Callable], deliver: t.Any, *, batch_size: int = 64) -> None:
+    THREAD_CACHE.start_threads_soon_many(fns, deliver, batch_size=batch_size)
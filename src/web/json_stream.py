@@ -0,0 +1,153 @@
+import codecs
+import json
+import re
+import typing as t
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Characters which may continue a number cut by a chunk boundary, like `1.` or `2e`.
+NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+
+
+def _is_truncated(error: json.JSONDecodeError) -> bool:
+    """Whether more data may fix `error`, as opposed to the text not being JSON at all."""
+    rest = error.doc[error.pos:]
+
+    if not rest.strip() or error.msg.startswith("Unterminated string"):
+        return True
+    if error.msg.startswith("Invalid \\uXXXX escape"):
+        return len(rest) < len("\\uXXXX\\uXXXX")  # A surrogate pair may be cut anywhere.
+    if error.msg == "Expecting value" and any(literal.startswith(rest) for literal in LITERALS):
+        return True
+
+    return NUMBER_TAIL.match(rest).end() == len(rest)
+
+
+class JSONArrayParser:
+    """
+    Incremental parser for a top-level JSON array.
+
+    Feed it chunks as they arrive and it returns the items completed so far, so
+    only the current, unfinished item is ever held in memory. Malformed input
+    raises as soon as no further data could make it valid.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+
+        self._started = False
+        self._finished = False
+        self._need_separator = False
+        self._after_comma = False
+
+    def feed(self, chunk: t.Union[bytes, str]) -> t.List[t.Any]:
+        if isinstance(chunk, bytes):
+            chunk = self._text.decode(chunk)
+
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> t.List[t.Any]:
+        self._buffer = self._buffer[self._pos:] + self._text.decode(b"", final=True)
+        self._pos = 0
+
+        items = self._parse(final=True)
+        if not self._finished:
+            raise ValueError("Truncated JSON array.")
+        return items
+
+    def _parse(self, final: bool) -> t.List[t.Any]:
+        buffer = self._buffer
+        pos = self._pos
+        items = []
+
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+
+            char = buffer[pos]
+            if self._finished:
+                raise ValueError(f"Unexpected data after the JSON array at {pos}.")
+
+            if not self._started:
+                if char != "[":
+                    raise ValueError("Expected a JSON array.")
+                self._started = True
+                pos += 1
+            elif self._need_separator:
+                if char == ",":
+                    self._need_separator = False
+                    self._after_comma = True
+                elif char == "]":
+                    self._finished = True
+                else:
+                    raise ValueError(f"Expected ',' or ']' at {pos}.")
+                pos += 1
+            elif char == "]" and not self._after_comma:
+                self._finished = True
+                pos += 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as exc:
+                    if final or not _is_truncated(exc):
+                        raise
+                    break
+
+                # A number at the end of the buffer may still have digits, a fraction or an exponent on the way.
+                if not final and NUMBER_TAIL.match(buffer, end).end() == len(buffer):
+                    break
+
+                items.append(item)
+                pos = end
+                self._need_separator = True
+                self._after_comma = False
+
+        self._pos = pos
+        return items
+
+
+class NDJSONParser:
+    """Incremental parser for newline delimited JSON, one document per line."""
+
+    def __init__(self) -> None:
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._partial = ""
+
+    def feed(self, chunk: t.Union[bytes, str]) -> t.List[t.Any]:
+        if isinstance(chunk, bytes):
+            chunk = self._text.decode(chunk)
+
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()
+        return [json.loads(line) for line in lines if line.strip()]
+
+    def close(self) -> t.List[t.Any]:
+        line = self._partial + self._text.decode(b"", final=True)
+        self._partial = ""
+        return [json.loads(line)] if line.strip() else []
+
+
+def _make_parser(ndjson: bool) -> t.Union[JSONArrayParser, NDJSONParser]:
+    return NDJSONParser() if ndjson else JSONArrayParser()
+
+
+def iter_json(chunks: t.Iterable[bytes], *, ndjson: bool = False) -> t.Iterator[t.Any]:
+    parser = _make_parser(ndjson)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_json(chunks: t.AsyncIterable[bytes], *, ndjson: bool = False) -> t.AsyncIterator[t.Any]:
+    parser = _make_parser(ndjson)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
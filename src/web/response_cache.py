@@ -0,0 +1,225 @@
+import asyncio
+import copy
+import functools
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+# (status, decoded body, body size in bytes, response headers)
+FetchResult = t.Tuple[int, t.Any, int, t.Mapping[str, str]]
+
+
+class CacheEntry:
+    __slots__ = ("value", "size", "expires", "etag", "last_modified")
+
+    def __init__(
+        self, value: t.Any, size: int, expires: float, etag: t.Optional[str], last_modified: t.Optional[str]
+    ) -> None:
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+
+class ResponseCache:
+    """
+    Usage Documentation:
+
+    ```
+    cache = ResponseCache(max_bytes=32 * 1024 * 1024, ttl=30)
+    route = Route("https://api.example.com", cache=cache)
+
+    await route._async_fetch("GET", "/config")  # miss
+    await route._async_fetch("GET", "/config")  # hit
+    print(cache.stats)
+    ```
+
+    Fresh entries are served straight from memory. Stale ones are revalidated with
+    `If-None-Match` / `If-Modified-Since`, so a `304` only costs a round trip. The
+    total size of the cached bodies is kept under `max_bytes` by evicting the least
+    recently used entries, and concurrent misses for the same key share one request.
+
+    Every caller gets its own deep copy of the cached value, so mutating a result
+    never changes what later hits return.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl: float = 60.0) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._async_inflight = {}
+        self._sync_inflight = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> t.Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
+
+    @staticmethod
+    def make_key(method: str, url: str, params: t.Any = None) -> t.Hashable:
+        """Key of a request, `params` being a mapping, a sequence of pairs or a query string."""
+        if not params:
+            query = ""
+        elif isinstance(params, (str, bytes)):
+            query = params
+        else:
+            items = params.items() if isinstance(params, t.Mapping) else params
+            # Sorting by name only keeps the order of repeated names, which matters to servers.
+            query = urlencode(sorted(items, key=lambda item: str(item[0])), doseq=True)
+
+        return method.upper(), url, query
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _lookup(self, key: t.Hashable) -> t.Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key: t.Hashable, value: t.Any, size: int, headers: t.Mapping[str, str]) -> None:
+        if "no-store" in headers.get("Cache-Control", "") or size > self.max_bytes:
+            return
+
+        entry = CacheEntry(
+            value, size, time.monotonic() + self.ttl, headers.get("ETag"), headers.get("Last-Modified")
+        )
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old.size
+
+            self._entries[key] = entry
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+                self.evictions += 1
+
+    @staticmethod
+    def _validators(entry: t.Optional[CacheEntry]) -> t.Dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _complete(self, key: t.Hashable, entry: t.Optional[CacheEntry], result: FetchResult) -> t.Any:
+        status, value, size, headers = result
+
+        if status == 304 and entry is not None:
+            self.revalidated += 1
+            entry.expires = time.monotonic() + self.ttl
+            return entry.value
+
+        self.misses += 1
+        if status == 200:
+            self._store(key, value, size, headers)
+        return value
+
+    def fetch(self, key: t.Hashable, load: t.Callable[[t.Dict[str, str]], FetchResult]) -> t.Any:
+        """Return the cached value for `key`, calling `load(validator_headers)` when needed."""
+        entry = self._lookup(key)
+        if entry is not None and entry.fresh:
+            self.hits += 1
+            return copy.deepcopy(entry.value)
+
+        with self._lock:
+            inflight = self._sync_inflight.get(key)
+            if inflight is None:
+                inflight = self._sync_inflight[key] = (threading.Event(), [])
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        done, outcome = inflight
+        if not leader:
+            done.wait()
+            if isinstance(outcome[0], BaseException):
+                raise outcome[0]
+            return copy.deepcopy(outcome[0])
+
+        try:
+            value = self._complete(key, entry, load(self._validators(entry)))
+            outcome.append(value)
+            return copy.deepcopy(value)
+        except BaseException as exc:
+            outcome.append(exc)
+            raise
+        finally:
+            with self._lock:
+                del self._sync_inflight[key]
+            done.set()
+
+    async def async_fetch(
+        self, key: t.Hashable, load: t.Callable[[t.Dict[str, str]], t.Awaitable[FetchResult]]
+    ) -> t.Any:
+        """
+        Async version of `fetch`, concurrent misses await the same request. The request
+        keeps running when its callers are cancelled, and still fills the cache.
+        """
+        entry = self._lookup(key)
+        if entry is not None and entry.fresh:
+            self.hits += 1
+            return copy.deepcopy(entry.value)
+
+        inflight = self._async_inflight.get(key)
+        if inflight is None:
+            # The request runs in its own task, so a cancelled caller only stops waiting for it.
+            inflight = self._async_inflight[key] = asyncio.get_running_loop().create_task(
+                self._async_load(key, entry, load)
+            )
+            inflight.add_done_callback(functools.partial(self._async_done, key))
+        else:
+            self.coalesced += 1
+
+        return copy.deepcopy(await asyncio.shield(inflight))
+
+    async def _async_load(
+        self,
+        key: t.Hashable,
+        entry: t.Optional[CacheEntry],
+        load: t.Callable[[t.Dict[str, str]], t.Awaitable[FetchResult]],
+    ) -> t.Any:
+        return self._complete(key, entry, await load(self._validators(entry)))
+
+    def _async_done(self, key: t.Hashable, task: asyncio.Task) -> None:
+        del self._async_inflight[key]
+        # Mark the exception as retrieved, every caller may have been cancelled meanwhile.
+        if not task.cancelled():
+            task.exception()
@@ -1,30 +1,109 @@
 import asyncio
 import typing as t
+from urllib.parse import urlencode
 
 import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+
+from .json_stream import aiter_json, iter_json
+from .response_cache import ResponseCache
 
 
 class Route:
-    def __init__(self, base_url: str) -> None:
+    """
+    Usage Documentation:
+
+    ```
+    async with Route("https://api.example.com") as route:
+        user = await route._async_fetch("GET", "/users/1")
+
+        # Up to `max_concurrency` requests in flight, results in input order
+        users = await route.fetch_many("GET", [f"/users/{i}" for i in range(100)])
+    ```
+
+    Sync and async requests both go through keep-alive connection pools, a
+    `requests.Session` and an `aiohttp` connector, capped per host. Pass your own
+    `session` / `async_session` to share the pools between several routes.
+
+    Give it a `ResponseCache` to serve repeated `GET` requests from memory.
+
+    Large responses can be read item by item instead, with flat memory use:
+
+    ```
+    async for row in route.async_stream("GET", "/export", ndjson=True):
+        ...
+    ```
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        pool_size: int = 100,
+        per_host: int = 20,
+        keepalive_timeout: float = 30.0,
+        max_concurrency: int = 20,
+        session: t.Optional[requests.Session] = None,
+        async_session: t.Optional[aiohttp.ClientSession] = None,
+        cache: t.Optional[ResponseCache] = None,
+    ) -> None:
         self.base_url = base_url
+        self.cache = cache
+        self.pool_size = pool_size
+        self.per_host = per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.max_concurrency = max_concurrency
 
-        self.__session = aiohttp.ClientSession()
-        self.__lock = asyncio.Lock()
+        self.__sync_session = session
+        self.__session = async_session
+        self.__owns_sessions = session is None, async_session is None
+
+    @property
+    def session(self) -> requests.Session:
+        if self.__sync_session is None:
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.per_host)
+            self.__sync_session = requests.Session()
+            self.__sync_session.mount("http://", adapter)
+            self.__sync_session.mount("https://", adapter)
+
+        return self.__sync_session
+
+    @property
+    def async_session(self) -> aiohttp.ClientSession:
+        # Created lazily, since the connector has to be made inside a running loop.
+        if self.__session is None or self.__session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self.__session = aiohttp.ClientSession(connector=connector)
+
+        return self.__session
 
     @staticmethod
     def form_url(url: str, data: dict = None) -> str:
         if not data:
-            data = {}
+            return url
+
+        separator = "&" if "?" in url else "?"
+        return url + separator + urlencode(data, doseq=True)
 
-        url += "?" + "&".join(
-            [f"{dict_key}={dict_value}" for dict_key, dict_value in data.items()]
-        )
+    async def __aenter__(self) -> "Route":
+        return self
 
-        return url
+    async def __aexit__(self, type: t.Any, value: t.Any, traceback: t.Any) -> None:
+        await self.close()
 
     async def close(self) -> None:
-        await self.__session.close()
+        owns_sync, owns_async = self.__owns_sessions
+
+        if owns_async and self.__session is not None:
+            await self.__session.close()
+        if owns_sync and self.__sync_session is not None:
+            self.__sync_session.close()
 
     def _fetch(
         self, method: str, path: str, data: dict = None, **kwargs
@@ -34,9 +113,20 @@ class Route:
 
         url = self.form_url(self.base_url + path, data)
 
-        with requests.request(method, url, **kwargs) as response:
-            json = response.json()
-            return json
+        if self.cache is None or method.upper() != "GET":
+            with self.session.request(method, url, **kwargs) as response:
+                json = response.json()
+                return json
+
+        headers = kwargs.pop("headers", None) or {}
+
+        def load(validators: dict) -> tuple:
+            with self.session.request(method, url, headers={**headers, **validators}, **kwargs) as response:
+                if response.status_code == 304:
+                    return 304, None, 0, response.headers
+                return response.status_code, response.json(), len(response.content), response.headers
+
+        return self.cache.fetch(self.cache.make_key(method, url, kwargs.get("params")), load)
 
     async def _async_fetch(
         self, method: str, path: str, data: dict = None, **kwargs
@@ -46,7 +136,50 @@ class Route:
 
         url = self.form_url(self.base_url + path, data)
 
-        async with self.__lock:
-            async with self.__session.request(method, url, **kwargs) as response:
+        if self.cache is None or method.upper() != "GET":
+            async with self.async_session.request(method, url, **kwargs) as response:
                 json = await response.json()
                 return json
+
+        headers = kwargs.pop("headers", None) or {}
+
+        async def load(validators: dict) -> tuple:
+            async with self.async_session.request(
+                method, url, headers={**headers, **validators}, **kwargs
+            ) as response:
+                if response.status == 304:
+                    return 304, None, 0, response.headers
+                body = await response.read()
+                return response.status, await response.json(), len(body), response.headers
+
+        return await self.cache.async_fetch(self.cache.make_key(method, url, kwargs.get("params")), load)
+
+    async def fetch_many(
+        self, method: str, paths: t.Iterable[str], data: dict = None, **kwargs
+    ) -> t.List[t.Any]:
+        """Fetch every path concurrently, `max_concurrency` at a time, keeping the input order."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(path: str) -> t.Any:
+            async with semaphore:
+                return await self._async_fetch(method, path, data, **kwargs)
+
+        return await asyncio.gather(*(fetch(path) for path in paths))
+
+    def stream(
+        self, method: str, path: str, data: dict = None, *, ndjson: bool = False, chunk_size: int = 64 * 1024, **kwargs
+    ) -> t.Iterator[t.Any]:
+        """Yield the items of a top-level JSON array, or of an NDJSON body, as they're read."""
+        url = self.form_url(self.base_url + path, data)
+
+        with self.session.request(method, url, stream=True, **kwargs) as response:
+            yield from iter_json(response.iter_content(chunk_size), ndjson=ndjson)
+
+    async def async_stream(
+        self, method: str, path: str, data: dict = None, *, ndjson: bool = False, chunk_size: int = 64 * 1024, **kwargs
+    ) -> t.AsyncIterator[t.Any]:
+        url = self.form_url(self.base_url + path, data)
+
+        async with self.async_session.request(method, url, **kwargs) as response:
+            async for item in aiter_json(response.content.iter_chunked(chunk_size), ndjson=ndjson):
+                yield item